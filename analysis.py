@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import bitboard
+import othello
+import search
+
+# Input format: one game per line, the moves in the usual notation (a1 to h8, column letter first),
+# written together or separated by spaces. Passes are skipped, they do not have to be written.
+# Output format: one tab separated line per move, see COLUMNS.
+
+COLUMNS = ['game', 'ply', 'player', 'played', 'best', 'best_score', 'played_score', 'loss']
+GAMES_PER_CHUNK = 500  # games read and searched together
+CACHE_SIZE = 200000  # analyzed positions, and scored (position, move) pairs, remembered between chunks
+WORKERS = os.cpu_count() or 1
+
+# Settings of a worker process, set by initialize_worker()
+WORKER = {}
+
+
+class InvalidGameException(Exception):
+    ''' Raised whenever a recorded game cannot be replayed '''
+    pass
+
+
+def parse_moves(line: str) -> [tuple]:
+    ''' Returns the (row, col) moves of a game line '''
+    text = ''.join(line.split()).lower().replace('pass', '').replace('--', '')
+    if len(text) % 2:
+        raise InvalidGameException('cannot read moves: ' + line.strip())
+    moves = []
+    for index in range(0, len(text), 2):
+        col = ord(text[index]) - ord('a')
+        row = int(text[index + 1]) - 1
+        moves.append((row, col))
+    return moves
+
+
+def move_name(cell) -> str:
+    if cell is None:
+        return 'pass'
+    row, col = cell
+    return chr(ord('a') + col) + str(row + 1)
+
+
+def game_positions(moves) -> [tuple]:
+    ''' Replays a game and returns (ply, player, own, opponent, move bit) for every move '''
+    geometry = bitboard.geometry(8, 8)
+    positions = []
+
+    def choose(own, opponent, turn, legal_moves):
+        if len(positions) == len(moves):
+            return None
+        ply = len(positions) + 1
+        row, col = moves[ply - 1]
+        if not 0 <= row < 8 or not 0 <= col < 8:
+            raise InvalidGameException('move outside the board at ply {}'.format(ply))
+        move = geometry.bit(row, col)
+        if not legal_moves & move:
+            raise InvalidGameException('illegal move {} at ply {}'.format(move_name((row, col)), ply))
+        positions.append((ply, turn, own, opponent, move))
+        return move
+
+    othello.play_from_start(choose)
+    if len(positions) < len(moves):
+        ply = len(positions) + 1
+        raise InvalidGameException('illegal move {} at ply {}'.format(move_name(moves[ply - 1]), ply))
+    return positions
+
+
+def initialize_worker(weights, mode, depth, time_limit) -> None:
+    ''' Builds the searcher of a worker process once, it is used for all of its positions '''
+    WORKER['engine'] = search.Search(8, 8, weights, mode)
+    WORKER['depth'] = depth
+    WORKER['time_limit'] = time_limit
+
+
+def analyze_position(task) -> tuple:
+    ''' Returns (best move, best score, depth) of one (own, opponent) position, the score
+        is from the point of view of the player to move '''
+    own, opponent = task
+    result = WORKER['engine'].think(own, opponent, WORKER['depth'], WORKER['time_limit'])
+    return result.move, result.score, result.depth
+
+
+def score_move(task) -> int:
+    ''' Returns the score of playing a move that is not the best one, searched one ply
+        less deep than the position was, so both scores see equally far '''
+    own, opponent, move, depth = task
+    engine = WORKER['engine']
+    new_own, new_opponent = engine.geometry.play(own, opponent, move)
+    return -engine.negamax(new_opponent, new_own, max(depth - 1, 0), search.MIN_VALUE, search.MAX_VALUE)
+
+
+def read_chunks(file, games_per_chunk: int):
+    ''' Yields lists of (game number, moves) without reading the whole file '''
+    chunk = []
+    for number, line in enumerate(file, 1):
+        if not line.strip() or line.startswith('#'):
+            continue
+        chunk.append((number, line))
+        if len(chunk) == games_per_chunk:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def analyze(games_path: str, output, executor, games_per_chunk=GAMES_PER_CHUNK, cache_size=CACHE_SIZE) -> dict:
+    ''' Analyzes every move of every game and writes one line per move to output, in the
+        order of the file. Every position is searched once however often it was played,
+        only the moves that were not the best one are scored on their own. Returns counters. '''
+    geometry = bitboard.geometry(8, 8)
+    best_moves = OrderedDict()  # (own, opponent) -> (best move, best score, depth)
+    played_scores = OrderedDict()  # (own, opponent, move bit) -> score
+    counters = {'games': 0, 'moves': 0, 'searched': 0, 'scored': 0, 'invalid': 0}
+    output.write('\t'.join(COLUMNS) + '\n')
+    with open(games_path) as file:
+        for chunk in read_chunks(file, games_per_chunk):
+            games = []
+            for number, line in chunk:
+                try:
+                    games.append((number, game_positions(parse_moves(line)), None))
+                except (InvalidGameException, ValueError) as error:
+                    games.append((number, [], error))
+            tasks = []
+            for number, positions, error in games:
+                for ply, turn, own, opponent, move in positions:
+                    if (own, opponent) not in best_moves:
+                        best_moves[own, opponent] = None
+                        tasks.append((own, opponent))
+            for key, analysis in zip(tasks, executor.map(analyze_position, tasks, chunksize=16)):
+                best_moves[key] = analysis
+            counters['searched'] += len(tasks)
+            tasks = []
+            for number, positions, error in games:
+                for ply, turn, own, opponent, move in positions:
+                    best, best_score, depth = best_moves[own, opponent]
+                    if geometry.bit(*best) != move and (own, opponent, move) not in played_scores:
+                        played_scores[own, opponent, move] = None
+                        tasks.append((own, opponent, move, depth))
+            for task, score in zip(tasks, executor.map(score_move, tasks, chunksize=16)):
+                played_scores[task[:3]] = score
+            counters['scored'] += len(tasks)
+            for number, positions, error in games:
+                if error is not None:
+                    counters['invalid'] += 1
+                    output.write('# game {}: {}\n'.format(number, error))
+                    continue
+                for ply, turn, own, opponent, move in positions:
+                    best, best_score, depth = best_moves[own, opponent]
+                    best_moves.move_to_end((own, opponent))
+                    played_score = best_score
+                    if geometry.bit(*best) != move:
+                        played_score = played_scores[own, opponent, move]
+                        played_scores.move_to_end((own, opponent, move))
+                    output.write('\t'.join(str(value) for value in (
+                        number, ply, turn, move_name(geometry.cell(move)), move_name(best), best_score,
+                        played_score, max(best_score - played_score, 0))) + '\n')
+                    counters['moves'] += 1
+                counters['games'] += 1
+            output.flush()
+            for cache in (best_moves, played_scores):
+                while len(cache) > cache_size:
+                    cache.popitem(last=False)
+    return counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Searches every position of recorded games')
+    parser.add_argument('games', help='file with one game per line')
+    parser.add_argument('--out', default='analysis.tsv')
+    parser.add_argument('--depth', type=int, default=othello.SEARCH_DEPTH)
+    parser.add_argument('--time', type=float, help='seconds per position, the depth is then a maximum')
+    parser.add_argument('--mode', choices=search.MODES[1:], default=search.PVS)
+    parser.add_argument('--weights', help='JSON file with an 8x8 weight table, default SQUARE_WEIGHTS')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    weights = othello.SQUARE_WEIGHTS
+    if args.weights:
+        with open(args.weights) as file:
+            weights = json.load(file)
+    with ProcessPoolExecutor(args.workers, initializer=initialize_worker,
+                             initargs=(weights, args.mode, args.depth, args.time)) as executor:
+        with open(args.out, 'w') as output:
+            counters = analyze(args.games, output, executor)
+    print('{games} games, {moves} moves, {searched} positions searched, {scored} played moves scored, '
+          '{invalid} invalid games'.format(**counters))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import numpy as np
+
+import bitboard
+import othello
+
+# Many 8x8 positions at once, every lane of the uint64 arrays is one independent game.
+# Bit row * 8 + col is cell (row, col), the same layout as bitboard.Geometry(8, 8).
+
+SIZE = 8
+FULL = np.uint64(0xFFFFFFFFFFFFFFFF)
+NOT_FIRST_COL = np.uint64(0xFEFEFEFEFEFEFEFE)
+NOT_LAST_COL = np.uint64(0x7F7F7F7F7F7F7F7F)
+
+# (shift, left, mask) per direction, the mask drops the bits that wrapped around a side edge
+SHIFTS = [(np.uint64(abs(row_dir * SIZE + col_dir)), row_dir * SIZE + col_dir > 0,
+           NOT_FIRST_COL if col_dir == 1 else NOT_LAST_COL if col_dir == -1 else FULL)
+          for row_dir, col_dir in bitboard.DIRECTIONS]
+
+
+def shifted(boards, shift, left: bool, mask):
+    return ((boards << shift) if left else (boards >> shift)) & mask
+
+
+def legal_moves(own, opponent):
+    ''' Returns the legal move mask of every lane '''
+    empty = ~(own | opponent)
+    moves = np.zeros_like(own)
+    for shift, left, mask in SHIFTS:
+        line = shifted(own, shift, left, mask) & opponent
+        for step in range(SIZE - 3):
+            line |= shifted(line, shift, left, mask) & opponent
+        moves |= shifted(line, shift, left, mask) & empty
+    return moves
+
+
+def flips(own, opponent, moves):
+    ''' Returns the opponent beads every lane flips by playing its move bit, 0 for no move '''
+    flipped = np.zeros_like(own)
+    for shift, left, mask in SHIFTS:
+        line = shifted(moves, shift, left, mask) & opponent
+        for step in range(SIZE - 3):
+            line |= shifted(line, shift, left, mask) & opponent
+        bounded = (shifted(line, shift, left, mask) & own) != 0
+        flipped |= np.where(bounded, line, np.uint64(0))
+    return flipped
+
+
+def swar_count(boards):
+    ''' Returns the number of beads of every lane, with shifts and masks for NumPy < 2.0 '''
+    boards = boards - ((boards >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    boards = (boards & np.uint64(0x3333333333333333)) + ((boards >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    boards = (boards + (boards >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((boards * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+if hasattr(np, 'bitwise_count'):
+    def count(boards):
+        ''' Returns the number of beads of every lane '''
+        # np.bitwise_count needs NumPy 2.0 or newer
+        return np.bitwise_count(boards).astype(np.int64)
+else:
+    count = swar_count
+
+
+def lowest_bits(boards):
+    return boards & (~boards + np.uint64(1))
+
+
+class Batch:
+
+    def __init__(self, own, opponent, black_to_move):
+        ''' N games, own and opponent are the uint64 bitboards of the side to move '''
+        self.own = np.asarray(own, dtype=np.uint64)
+        self.opponent = np.asarray(opponent, dtype=np.uint64)
+        self.black_to_move = np.asarray(black_to_move, dtype=bool)
+        self.finished = np.zeros(len(self.own), dtype=bool)
+        self.moves = np.zeros_like(self.own)
+        self.update()
+
+    @classmethod
+    def start(cls, number: int):
+        ''' Returns number games in the starting position, black to move '''
+        black, white = othello.OthelloGame(SIZE, SIZE, othello.BLACK).bitboards(othello.BLACK)
+        return cls(np.full(number, black, dtype=np.uint64), np.full(number, white, dtype=np.uint64),
+                   np.ones(number, dtype=bool))
+
+    @classmethod
+    def from_games(cls, games):
+        ''' Returns a batch of the positions of OthelloGame objects, each with its own turn '''
+        own = []
+        opponent = []
+        for game in games:
+            boards = game.bitboards(game.turn)
+            own.append(boards[0])
+            opponent.append(boards[1])
+        return cls(np.array(own, dtype=np.uint64), np.array(opponent, dtype=np.uint64),
+                   [game.turn == othello.BLACK for game in games])
+
+    def __len__(self):
+        return len(self.own)
+
+    def update(self) -> None:
+        ''' Computes the legal moves, and lets the lanes without any pass. A lane where
+            neither side can move is finished. '''
+        self.moves = legal_moves(self.own, self.opponent)
+        stuck = (self.moves == 0) & ~self.finished
+        if stuck.any():
+            other_moves = legal_moves(self.opponent[stuck], self.own[stuck])
+            passing = np.flatnonzero(stuck)[other_moves != 0]
+            self.finished[np.flatnonzero(stuck)[other_moves == 0]] = True
+            self.own[passing], self.opponent[passing] = self.opponent[passing], self.own[passing]
+            self.black_to_move[passing] = ~self.black_to_move[passing]
+            self.moves[passing] = other_moves[other_moves != 0]
+
+    def play(self, moves) -> None:
+        ''' Plays one move bit per lane, finished lanes ignore theirs '''
+        moves = np.where(self.finished, np.uint64(0), np.asarray(moves, dtype=np.uint64))
+        if (moves & ~self.moves).any():
+            raise othello.InvalidMoveException('illegal move in lanes {}'.format(
+                np.flatnonzero(moves & ~self.moves).tolist()))
+        playing = ~self.finished
+        flipped = flips(self.own, self.opponent, moves)
+        own = self.own | moves | flipped
+        opponent = self.opponent & ~flipped
+        self.own = np.where(playing, opponent, self.own)
+        self.opponent = np.where(playing, own, self.opponent)
+        self.black_to_move = np.where(playing, ~self.black_to_move, self.black_to_move)
+        self.update()
+
+    def random_moves(self, generator):
+        ''' Returns one uniformly chosen legal move bit per lane, 0 for the finished lanes '''
+        moves = self.moves.copy()
+        skip = np.floor(generator.random(len(moves)) * count(moves)).astype(np.int64)
+        for step in range(skip.max(initial=0)):
+            moves = np.where(skip > step, moves & (moves - np.uint64(1)), moves)
+        return lowest_bits(moves)
+
+    def playout(self, generator=None) -> int:
+        ''' Plays random moves until every lane is finished and returns the number of moves played '''
+        if generator is None:
+            generator = np.random.default_rng()
+        played = 0
+        while not self.finished.all():
+            played += int(np.count_nonzero(~self.finished))
+            self.play(self.random_moves(generator))
+        return played
+
+    def black_white(self) -> tuple:
+        ''' Returns the (black, white) bitboards of every lane '''
+        return (np.where(self.black_to_move, self.own, self.opponent),
+                np.where(self.black_to_move, self.opponent, self.own))
+
+    def margins(self):
+        ''' Returns black beads minus white beads of every lane '''
+        black, white = self.black_white()
+        return count(black) - count(white)
@@ -0,0 +1,113 @@
+import argparse
+import random
+import time
+
+import bitboard
+import othello
+import search
+
+SIZES = [8, 10, 12, 14, 16]
+POSITIONS = 10  # random midgame positions used to compare the search modes
+MIN_SECONDS = 1.0  # perft is repeated until the timing covers at least this long
+
+
+def starting_bitboards(size: int) -> tuple:
+    ''' Returns the (black, white) bitboards of the starting position '''
+    game = othello.OthelloGame(size, size, othello.BLACK)
+    return game.bitboards(othello.BLACK)
+
+
+def nodes_per_second(size: int, depth: int, min_seconds=MIN_SECONDS) -> tuple:
+    ''' Runs perft from the starting position until min_seconds passed, a single shallow
+        perft takes a few milliseconds. Returns (nodes of one run, runs, seconds). '''
+    geometry = bitboard.geometry(size, size)
+    black, white = starting_bitboards(size)
+    runs = 0
+    start_time = time.time()
+    while True:
+        nodes = geometry.perft(black, white, depth)
+        runs += 1
+        seconds = time.time() - start_time
+        if seconds >= min_seconds:
+            return nodes, runs, seconds
+
+
+def random_positions(number: int, plies: int, seed=0) -> [tuple]:
+    ''' Returns (own, opponent) bitboards reached by random play from the start '''
+    generator = random.Random(seed)
+    positions = []
+    while len(positions) < number:
+        played = []
+
+        def choose(own, opponent, turn, moves):
+            if len(played) == plies:
+                return None
+            played.append(generator.choice(list(bitboard.bits(moves))))
+            return played[-1]
+
+        own, opponent, turn = othello.play_from_start(choose)
+        # games that ended before the plies were played are left out
+        if len(played) == plies:
+            positions.append((own, opponent))
+    return positions
+
+
+def compare_search_modes(depth: int) -> None:
+    ''' Prints the nodes and time every search mode needs for the same fixed-depth searches '''
+    positions = random_positions(POSITIONS, 20)
+    print('{:>11} {:>10} {:>9}'.format('mode', 'nodes', 'seconds'))
+    for mode in search.MODES:
+        nodes = 0
+        start_time = time.time()
+        for own, opponent in positions:
+            if mode == search.ALPHA_BETA:
+                game = othello.OthelloGame.from_bitboards(8, 8, othello.BLACK, own, opponent)
+                game.minimax_alpha_beta(othello.BLACK, depth, othello.MIN_VALUE, othello.MAX_VALUE, time.time(),
+                                        float('inf'))
+                nodes += game.nodes
+                continue
+            engine = search.Search(8, 8, othello.SQUARE_WEIGHTS, mode)
+            nodes += engine.think(own, opponent, depth).nodes
+        print('{:>11} {:>10} {:>9.3f}'.format(mode, nodes, time.time() - start_time))
+
+
+def batch_playouts(lanes: int) -> None:
+    ''' Prints the random playout speed of the vectorized backend '''
+    import numpy as np
+
+    import batch
+
+    games = batch.Batch.start(lanes)
+    start_time = time.time()
+    moves = games.playout(np.random.default_rng(0))
+    seconds = time.time() - start_time
+    print('{} games, {} moves in {:.3f}s, {:.0f} moves/sec'.format(lanes, moves, seconds, moves / max(seconds, 1e-9)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move generation speed for different board sizes')
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--min-seconds', type=float, default=MIN_SECONDS,
+                        help='repeat perft until every board size took this long')
+    parser.add_argument('--search', action='store_true', help='compare the search modes instead')
+    parser.add_argument('--batch', type=int, metavar='GAMES', help='time random playouts of this many games at once')
+    args = parser.parse_args()
+
+    if args.batch:
+        batch_playouts(args.batch)
+        return
+
+    if args.search:
+        compare_search_modes(args.depth)
+        return
+
+    print('{:>7} {:>10} {:>6} {:>9} {:>12}'.format('board', 'nodes', 'runs', 'seconds', 'nodes/sec'))
+    for size in args.sizes:
+        nodes, runs, seconds = nodes_per_second(size, args.depth, args.min_seconds)
+        print('{:>7} {:>10} {:>6} {:>9.3f} {:>12.0f}'.format('{0}x{0}'.format(size), nodes, runs, seconds,
+                                                            nodes * runs / max(seconds, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+from functools import lru_cache
+
+# The 8 directions as (row_dir, col_dir)
+DIRECTIONS = [(row_dir, col_dir) for row_dir in range(-1, 2) for col_dir in range(-1, 2) if (row_dir, col_dir) != (0, 0)]
+
+
+class Geometry:
+
+    def __init__(self, rows: int, cols: int):
+        ''' Precomputes the masks of a rows x cols board. Cell (row, col) is bit row * cols + col
+            of an arbitrary-precision int, so any board size works. '''
+        self.rows = rows
+        self.cols = cols
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+        not_first_col = 0
+        not_last_col = 0
+        for row in range(rows):
+            for col in range(cols):
+                if col != 0:
+                    not_first_col |= 1 << (row * cols + col)
+                if col != cols - 1:
+                    not_last_col |= 1 << (row * cols + col)
+        # (shift, mask) per direction: mask drops the bits that wrapped around a side edge
+        self.shifts = []
+        for row_dir, col_dir in DIRECTIONS:
+            mask = self.full
+            if col_dir == 1:
+                mask &= not_first_col
+            elif col_dir == -1:
+                mask &= not_last_col
+            self.shifts.append((row_dir * cols + col_dir, mask))
+        self.steps = max(rows, cols) - 2
+
+    def bit(self, row: int, col: int) -> int:
+        ''' Returns the bit of the specified cell '''
+        return 1 << (row * self.cols + col)
+
+    def cell(self, bit: int) -> tuple:
+        ''' Returns the (row, col) of a single bit '''
+        return divmod(bit.bit_length() - 1, self.cols)
+
+    def from_board(self, board, own_color: str, opponent_color: str) -> tuple:
+        ''' Returns the (own, opponent) bitboards of a list-of-lists board '''
+        own = 0
+        opponent = 0
+        bit = 1
+        for row in board:
+            for cell in row:
+                if cell == own_color:
+                    own |= bit
+                elif cell == opponent_color:
+                    opponent |= bit
+                bit <<= 1
+        return own, opponent
+
+    def to_board(self, own: int, opponent: int, own_color: str, opponent_color: str, empty_color: str) -> [[str]]:
+        ''' Returns the list-of-lists board of the bitboards, the reverse of from_board '''
+        return [[own_color if own >> square & 1 else opponent_color if opponent >> square & 1 else empty_color
+                 for square in range(row * self.cols, (row + 1) * self.cols)] for row in range(self.rows)]
+
+    def legal_moves(self, own: int, opponent: int) -> int:
+        ''' Returns a bitboard of all the cells own can move to '''
+        empty = ~(own | opponent) & self.full
+        moves = 0
+        for shift, mask in self.shifts:
+            if shift > 0:
+                line = (own << shift) & mask & opponent
+                for step in range(self.steps - 1):
+                    line |= (line << shift) & mask & opponent
+                moves |= (line << shift) & mask & empty
+            else:
+                shift = -shift
+                line = (own >> shift) & mask & opponent
+                for step in range(self.steps - 1):
+                    line |= (line >> shift) & mask & opponent
+                moves |= (line >> shift) & mask & empty
+        return moves
+
+    def flips(self, own: int, opponent: int, move: int) -> int:
+        ''' Returns the bitboard of the opponent beads flipped by playing the move bit '''
+        flipped = 0
+        for shift, mask in self.shifts:
+            line = 0
+            current = move
+            while True:
+                current = (current << shift if shift > 0 else current >> -shift) & mask
+                if not current & opponent:
+                    break
+                line |= current
+            if current & own:
+                flipped |= line
+        return flipped
+
+    def play(self, own: int, opponent: int, move: int) -> tuple:
+        ''' Returns the (own, opponent) bitboards after own plays the move bit '''
+        flipped = self.flips(own, opponent, move)
+        return own | move | flipped, opponent & ~flipped
+
+    def perft(self, own: int, opponent: int, depth: int, passed=False) -> int:
+        ''' Counts the nodes of the full game tree to the given depth '''
+        if depth == 0:
+            return 1
+        moves = self.legal_moves(own, opponent)
+        if not moves:
+            if passed:
+                return 1
+            return self.perft(opponent, own, depth - 1, True)
+        nodes = 0
+        while moves:
+            move = moves & -moves
+            moves ^= move
+            new_own, new_opponent = self.play(own, opponent, move)
+            nodes += self.perft(new_opponent, new_own, depth - 1)
+        return nodes
+
+
+@lru_cache(maxsize=None)
+def geometry(rows: int, cols: int) -> Geometry:
+    ''' Returns the shared Geometry of the given board size '''
+    return Geometry(rows, cols)
+
+
+def bits(bitboard: int):
+    ''' Yields every single set bit of the bitboard '''
+    while bitboard:
+        bit = bitboard & -bitboard
+        bitboard ^= bit
+        yield bit
+
+
+def count(bitboard: int) -> int:
+    ''' Returns the number of beads on the bitboard '''
+    return bin(bitboard).count('1')
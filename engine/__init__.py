@@ -0,0 +1,39 @@
+# Headless Othello engine: position, move generation, search and evaluation without any GUI.
+# The package only re-exports the names below from the top-level modules, which stay where
+# they are. They are imported on first use, so importing the package does no work.
+import importlib
+
+EXPORTS = {
+    'OthelloGame': 'othello',
+    'InvalidMoveException': 'othello',
+    'BLACK': 'othello',
+    'WHITE': 'othello',
+    'NONE': 'othello',
+    'SQUARE_WEIGHTS': 'othello',
+    'generate_weights': 'othello',
+    'Geometry': 'bitboard',
+    'geometry': 'bitboard',
+    'Search': 'search',
+    'SearchResult': 'search',
+    'TranspositionTable': 'search',
+    'MODES': 'search',
+    'PatternTable': 'patterns',
+    'TimeManager': 'timecontrol',
+    'ProbCut': 'probcut',
+    'EnginePool': 'pool',
+    'LazySMP': 'smp',
+    'Ponderer': 'ponder',
+    'SharedPositions': 'positions',
+    'Batch': 'batch',
+    'MCTS': 'mcts',
+}
+
+__all__ = list(EXPORTS)
+
+
+def __getattr__(name):
+    if name not in EXPORTS:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+    value = getattr(importlib.import_module(EXPORTS[name]), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,78 @@
+import argparse
+import time
+
+
+def self_play(args) -> None:
+    ''' Plays engine against engine games and prints their scores '''
+    import othello
+    import search
+    import timecontrol
+
+    wins = {othello.BLACK: 0, othello.WHITE: 0, None: 0}
+    for number in range(args.games):
+        time_manager = timecontrol.TimeManager(args.game_time, args.increment) if args.game_time else None
+        game = othello.OthelloGame(args.size, args.size, othello.BLACK, search_mode=args.mode,
+                                   time_manager=time_manager)
+        start_time = time.time()
+        black_score, white_score = game.ai_vs_ai()
+        wins[game.winner_color] += 1
+        print('game {}: black {} white {} ({:.1f}s)'.format(number + 1, black_score, white_score,
+                                                         time.time() - start_time))
+        if args.mode == search.MCTS:
+            for turn, engine in sorted(game.engines.items()):
+                print('  {}: {} playouts, {:.0f} playouts/sec'.format(
+                    turn, engine.total_playouts, engine.total_playouts / max(engine.total_time, 1e-9)))
+    print('black wins {}, white wins {}, draws {}'.format(wins[othello.BLACK], wins[othello.WHITE], wins[None]))
+
+
+def evolve(args) -> None:
+    ''' Runs the genetic algorithm that tunes the square weights '''
+    import evolution
+
+    evolution.SEARCH_MODE = args.mode
+    evolution.GAME_TIME = args.game_time
+    evolution.INCREMENT = args.increment
+    if args.islands > 1:
+        best = evolution.island_model(args.islands, args.population, args.epochs, args.migration_interval,
+                                      args.migrants, args.topology)
+        print('best gens: {}'.format(best))
+    else:
+        evolution.genetic_algorithm(args.population, epochs=args.epochs, checkpoint=args.checkpoint)
+
+
+def main():
+    import search
+
+    parser = argparse.ArgumentParser(prog='python -m engine', description='Headless Othello engine')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    selfplay_parser = commands.add_parser('selfplay', help='play engine against engine games')
+    selfplay_parser.add_argument('--games', type=int, default=1)
+    selfplay_parser.add_argument('--size', type=int, default=8)
+    selfplay_parser.set_defaults(function=self_play)
+
+    evolve_parser = commands.add_parser('evolve', help='tune the square weights with the genetic algorithm')
+    evolve_parser.add_argument('--population', type=int, default=60, help='gens of every island')
+    evolve_parser.add_argument('--epochs', type=int, default=15)
+    evolve_parser.add_argument('--islands', type=int, default=1,
+                               help='evolve this many populations in their own processes')
+    evolve_parser.add_argument('--migration-interval', type=int, default=3, help='epochs between migrations')
+    evolve_parser.add_argument('--migrants', type=int, default=2, help='gens every island sends per migration')
+    evolve_parser.add_argument('--checkpoint', help='file the run is saved to after every game and resumed from, '
+                               'single population runs only')
+    evolve_parser.add_argument('--topology', choices=['ring', 'complete'], default='ring')
+    evolve_parser.set_defaults(function=evolve)
+
+    for command_parser in (selfplay_parser, evolve_parser):
+        command_parser.add_argument('--mode', choices=search.ENGINE_MODES, default=search.ALPHA_BETA)
+        command_parser.add_argument('--game-time', type=float, help='seconds per player for a whole game')
+        command_parser.add_argument('--increment', type=float, default=0)
+
+    args = parser.parse_args()
+    if args.command == 'evolve' and args.checkpoint and args.islands > 1:
+        evolve_parser.error('--checkpoint cannot be used with --islands, island runs are not saved')
+    args.function(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,497 @@
+import json
+import multiprocessing
+import os
+import othello
+import pool
+import search
+import timecontrol
+import random
+import time
+
+UPPERBOUND = 75
+LOWERBOUND = -75
+
+ROWS = 8
+COLUMNS = 8
+GAME_TIME = None  # seconds per player for a whole game, None keeps the fixed time per move
+INCREMENT = 0
+SEARCH_MODE = search.ALPHA_BETA  # the negamax modes share their tables through ENGINE_POOL
+ENGINE_POOL = None  # pool.EnginePool of the games, made by genetic_algorithm or an island worker
+RES = [
+    [120, -20, 20, 5, 5, 20, -20, 120],
+    [-20, -40, -5, -5, -5, -5, -40, -20],
+    [20, -5, 15, 3, 3, 15, -5, 20],
+    [5, -5, 3, 3, 3, 3, -5, 5],
+    [5, -5, 3, 3, 3, 3, -5, 5],
+    [20, -5, 15, 3, 3, 15, -5, 20],
+    [-20, -40, -5, -5, -5, -5, -40, -20],
+    [120, -20, 20, 5, 5, 20, -20, 120]
+]
+POPULATION = []
+# The genetic operators draw from their own generator, so the random moves of the games
+# do not change the evolution and a checkpoint only has to keep this state
+RANDOM = random.Random()
+CHECKPOINT = None  # Checkpoint of the running genetic_algorithm, if any
+RING = 'ring'  # every island sends its migrants to the next one
+COMPLETE = 'complete'  # every island sends its migrants to all the others
+TOPOLOGIES = [RING, COMPLETE]
+VERBOSE = True  # island workers turn the progress output off and send events instead
+
+
+def log(*values):
+    if VERBOSE:
+        print(*values)
+
+
+class Gen:
+    def __init__(self, weights, black_score, white_score, gen):
+        self.weights = weights
+        self.black_score = black_score
+        self.white_score = white_score
+        self.gen = gen
+        self.margin = black_score - white_score
+        self.wins = 0
+
+    def set_margin(self, margin):
+        self.margin = margin
+
+    def increment(self):
+        self.wins += 1
+
+    def __str__(self):
+        return self.gen
+
+
+class Checkpoint:
+    def __init__(self, path):
+        ''' The state of a genetic_algorithm run at the start of an epoch, plus the results of
+            the games of that epoch played so far. Every change is written to path at once. '''
+        self.path = path
+        self.epoch = 0
+        self.population = []
+        self.random_state = None
+        self.weights = None
+        self.games = []
+        self.next_game = 0
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as file:
+            data = json.load(file)
+        checkpoint = cls(path)
+        checkpoint.epoch = data['epoch']
+        checkpoint.population = data['population']
+        version, state, gauss = data['random_state']
+        checkpoint.random_state = (version, tuple(state), gauss)
+        checkpoint.weights = data['weights']
+        checkpoint.games = data['games']
+        return checkpoint
+
+    def save(self):
+        ''' Writes a temporary file and renames it over the checkpoint, so a crash
+            leaves either the old or the new checkpoint '''
+        data = {'epoch': self.epoch, 'population': self.population, 'random_state': self.random_state,
+                'weights': self.weights, 'games': self.games}
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(data, file, separators=(',', ':'))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    def start_epoch(self, epoch, population):
+        self.epoch = epoch
+        self.population = [[list(gen.gen), gen.black_score, gen.white_score, gen.margin, gen.wins] for gen in population]
+        self.random_state = RANDOM.getstate()
+        # create_weights rewrites the shared RES table, every gen plays with it
+        self.weights = [list(row) for row in RES]
+        self.games = []
+        self.next_game = 0
+        self.save()
+
+    def restore(self):
+        ''' Sets the random state and RES back to the start of the epoch and returns its population '''
+        RANDOM.setstate(self.random_state)
+        RES[:] = self.weights
+        population = []
+        for gen, black_score, white_score, margin, wins in self.population:
+            current_gen = Gen(RES, black_score, white_score, gen)
+            current_gen.margin = margin
+            current_gen.wins = wins
+            population.append(current_gen)
+        self.next_game = 0
+        return population
+
+    def play(self, gen1, gen2, play):
+        ''' Returns the recorded (first score, second score) of the next game of the epoch,
+            or plays it with play() and records it '''
+        if self.next_game < len(self.games):
+            first, second, first_score, second_score = self.games[self.next_game]
+            if first != gen1.gen or second != gen2.gen:
+                raise ValueError("checkpoint " + self.path + " does not match the replayed epoch")
+        else:
+            first_score, second_score = play()
+            self.games.append([list(gen1.gen), list(gen2.gen), first_score, second_score])
+            self.save()
+        self.next_game += 1
+        return first_score, second_score
+
+
+def new_game(first_player, black_weights, white_weights):
+    time_manager = None
+    if GAME_TIME is not None:
+        time_manager = timecontrol.TimeManager(GAME_TIME, INCREMENT)
+    game = othello.OthelloGame(ROWS, COLUMNS, othello.BLACK, first_player=first_player, black_weights=black_weights,
+                               white_weights=white_weights, time_manager=time_manager, search_mode=SEARCH_MODE,
+                               engine_pool=ENGINE_POOL)
+    return game
+
+
+def population_initialization(init):
+    for i in range(init):
+        gen = RANDOM.sample(range(LOWERBOUND, UPPERBOUND), 8)
+        current_gen = Gen(create_weights(gen), 0, 0, gen)
+        # current_gen.set_margin(i)
+        POPULATION.append(current_gen)
+    return POPULATION
+
+
+def fitness_function(gen1, gen2):
+    black_weights = gen1.weights
+    white_weights = gen2.weights
+    log()
+    # print(str(gen1.gen) + " VS. " + str(gen2.gen))
+    log("                                   " + str(dist(gen1.gen)) + " VS. " + str(dist(gen2.gen)))
+    if CHECKPOINT is not None:
+        first_score, second_score = CHECKPOINT.play(
+            gen1, gen2, lambda: new_game(othello.BLACK, black_weights, white_weights).ai_vs_ai())
+    else:
+        current_game = new_game(othello.BLACK, black_weights, white_weights)
+        first_score, second_score = current_game.ai_vs_ai()
+    gen1.black_score = gen2.white_score = first_score
+    gen1.white_score = gen2.black_score = second_score
+    if first_score > second_score:
+        return gen1
+    else:
+        return gen2
+
+
+def selection(gens, pop):
+    selected1 = []
+    for i in range(int(pop / 6)):
+        winner1, winner2, winner3 = precise_select(gens, i)
+        selected1.append(winner1)
+        selected1.append(winner2)
+        selected1.append(winner3)
+    RANDOM.shuffle(selected1)
+    return selected1
+
+
+def select(gens, i):
+    winner1 = fitness_function(gens[(i * 6) + 0], gens[(i * 6) + 1])
+    log("winner1 = " + str(winner1.gen) + " " + str(dist(winner1.gen)))
+    winner2 = fitness_function(gens[(i * 6) + 2], gens[(i * 6) + 3])
+    log("winner2 = " + str(winner2.gen) + " " + str(dist(winner2.gen)))
+    winner3 = fitness_function(gens[(i * 6) + 4], gens[(i * 6) + 5])
+    log("winner3 = " + str(winner3.gen) + " " + str(dist(winner3.gen)))
+    return winner1, winner2, winner3
+
+
+def compare_gen(gen1, gen2):
+    arr1 = gen1.gen
+    arr2 = gen2.gen
+    for i in range(len(arr1)):
+        if arr1[i] != arr2[i]:
+            return False
+    return True
+
+
+def precise_select(gens, i):
+    gens_temp = list.copy(gens[(i * 6) + 0:(i * 6) + 6])
+    final_opp = []
+    # print("Size of gens_temp = " + str(len(gens_temp)))
+    for i in range(len(gens_temp)):
+        opponent_list = list.copy(gens_temp)
+        main_opponent = opponent_list[i]
+        final_opp.append(main_opponent)
+        main_opponent.wins = 0
+        del opponent_list[i]
+        for o in range(len(opponent_list)):
+            winner = fitness_function(main_opponent, opponent_list[o])
+            if compare_gen(winner, main_opponent):
+                main_opponent.increment()
+        log("Gen " + str(i) + " : " + str(main_opponent.wins) + " wins, Weights = " + str(main_opponent.gen))
+    sort = sorted(final_opp, key=lambda x: x.wins, reverse=True)
+    log()
+    log(sort[0].gen)
+    log(sort[1].gen)
+    log(sort[2].gen)
+    log()
+    return sort[0], sort[1], sort[2]
+
+
+def mutation(crossovered, number):
+    for i in range(number):
+        p = RANDOM.randint(1, 3)
+        if p == 1:
+            crossovered[i].gen = add_noise(crossovered[i].gen)
+        else:
+            log("SORT MUTATE")
+            crossovered[i].gen.sort()
+            crossovered[i].gen.reverse()
+
+    return crossovered
+
+
+def add_noise(arr1):
+    for i in range(len(arr1)):
+        noise = RANDOM.randint(-15, 30)
+        arr1[i] += noise
+        if arr1[i] > UPPERBOUND:
+            arr1[i] = UPPERBOUND
+        if arr1[i] < LOWERBOUND:
+            arr1[i] = LOWERBOUND
+    return arr1
+
+
+def crossover(selected, childs):
+    values = len(selected)
+    temp = selected
+    for i in range(childs):
+        rand_index = RANDOM.sample(range(0, values), 2)
+        avr = average(selected[rand_index[0]], selected[rand_index[1]])
+        curr_black_score = selected[rand_index[0]].black_score + selected[rand_index[1]].black_score
+        curr_white_score = selected[rand_index[0]].white_score + selected[rand_index[1]].white_score
+        current_gen = Gen(create_weights(avr), curr_black_score, curr_white_score, avr)
+        # current_gen.set_margin(i)
+        temp.append(current_gen)
+    return temp
+
+
+def average(gen1, gen2):
+    # alpha1 = gen1.margin / (gen1.margin + gen2.margin)
+    # alpha2 = gen2.margin / (gen1.margin + gen2.margin)
+    arr1 = gen1.gen
+    arr2 = gen2.gen
+    # avr1 = [x * (alpha1 + 0.001) for x in arr1]
+    # avr2 = [x * (alpha2 + 0.001) for x in arr2]
+    avr = [sum(x) for x in zip(arr1, arr2)]
+    avr = [x / 2 for x in avr]
+    return avr
+
+
+def dist(gen):
+    temp = gen
+    best = [120, 20, 15, 5, 3, -5, -20, -40]
+    sub = [a_i - b_i for a_i, b_i in zip(best, temp)]
+    return sum(sub)
+
+
+def genetic_algorithm(init, pc=1, pm=0.5, epochs=15, checkpoint=None):
+    # checkpoint is the path of a file the run is saved to, and resumed from if it exists
+    global CHECKPOINT, ENGINE_POOL
+    if ENGINE_POOL is None:
+        ENGINE_POOL = pool.EnginePool()
+    first_epoch = 0
+    if checkpoint is not None and os.path.exists(checkpoint):
+        CHECKPOINT = Checkpoint.load(checkpoint)
+        first_epoch = CHECKPOINT.epoch
+        population = CHECKPOINT.restore()
+        POPULATION[:] = population
+        log("RESUMING EPOCH " + str(first_epoch) + " AFTER " + str(len(CHECKPOINT.games)) + " GAMES")
+    else:
+        population = population_initialization(init)
+        if checkpoint is not None:
+            CHECKPOINT = Checkpoint(checkpoint)
+
+    try:
+        for epoch in range(first_epoch, epochs):
+            if CHECKPOINT is not None and (epoch != first_epoch or not CHECKPOINT.games):
+                CHECKPOINT.start_epoch(epoch, population)
+            log("==================================================================================")
+            log("                                  EPOCH " + str(epoch) + "                        ")
+            population = evolve_epoch(population, init, pc, pm)
+            log("==================================================================================")
+        if CHECKPOINT is not None:
+            CHECKPOINT.start_epoch(epochs, population)
+    finally:
+        CHECKPOINT = None
+    return population
+
+
+def evolve_epoch(population, init, pc=1, pm=0.5):
+    selected = selection(population, init)
+
+    crossovered = selected
+    pct = RANDOM.uniform(0., 1.)
+    if pct <= pc:
+        crossovered = crossover(selected, int(init / 2))
+
+    pmt = RANDOM.uniform(0., 1.)
+    # crossovered_sorted = sorted(crossovered, key=lambda x: x.margin, reverse=False)
+    crossovered_sorted = crossovered
+
+    if pmt < pm:
+        log("MUTATION IN THIS GEN")
+        mutated = mutation(crossovered_sorted, min(20, len(crossovered_sorted)))
+    else:
+        mutated = crossovered_sorted
+    print_list(population)
+    # population = random.shuffle(mutated)
+    return mutated
+
+
+def best_gens(population, number):
+    # wins of the last tournament, the children of this epoch have not played yet
+    return sorted(population, key=lambda x: x.wins, reverse=True)[:number]
+
+
+def island_worker(number, size, epochs, migration_interval, migrants, inbox, outboxes, senders, events, settings,
+                  seed=None, pc=1, pm=0.5):
+    global VERBOSE, SEARCH_MODE, GAME_TIME, INCREMENT, ENGINE_POOL
+    VERBOSE = False
+    SEARCH_MODE, GAME_TIME, INCREMENT = settings
+    ENGINE_POOL = pool.EnginePool()
+    # forked islands would all inherit the random state of the main process
+    random.seed(seed if seed is None else seed + number)
+    RANDOM.seed(seed if seed is None else seed + number)
+    try:
+        del POPULATION[:]
+        population = population_initialization(size)
+        for epoch in range(epochs):
+            started = time.time()
+            population = evolve_epoch(population, size, pc, pm)
+            best = best_gens(population, 1)[0]
+            events.put({'event': 'epoch', 'island': number, 'epoch': epoch, 'best': list(best.gen),
+                        'wins': best.wins, 'seconds': time.time() - started})
+            if (epoch + 1) % migration_interval or epoch + 1 == epochs:
+                continue
+            sent = [list(gen.gen) for gen in best_gens(population, migrants)]
+            for outbox in outboxes:
+                outbox.put(sent)
+            received = [gen for sender in range(senders) for gen in inbox.get()]
+            worst = sorted(population, key=lambda x: x.wins)[:len(received)]
+            for old, gen in zip(worst, received):
+                population[population.index(old)] = Gen(create_weights(gen), 0, 0, gen)
+            events.put({'event': 'migrate', 'island': number, 'epoch': epoch, 'sent': sent, 'received': received})
+        events.put({'event': 'done', 'island': number, 'population': [list(gen.gen) for gen in population],
+                    'best': [list(gen.gen) for gen in best_gens(population, migrants)]})
+    except Exception as error:
+        events.put({'event': 'error', 'island': number, 'error': repr(error)})
+        raise
+
+
+def print_event(event):
+    if event['event'] == 'epoch':
+        print("island {island} epoch {epoch}: best {best} ({wins} wins) in {seconds:.1f}s".format(**event))
+    elif event['event'] == 'migrate':
+        print("island {island} epoch {epoch}: sent {sent}, received {received}".format(**event))
+    elif event['event'] == 'done':
+        print("island {island} done: best {best}".format(**event))
+
+
+def island_model(islands, island_size, epochs=15, migration_interval=3, migrants=2, topology=RING,
+                 on_event=print_event, seed=None, pc=1, pm=0.5):
+    ''' Evolves one sub-population per process. Every migration_interval epochs each island sends
+        its best gens to its neighbours in the topology and replaces its worst gens with theirs.
+        Progress is reported by calling on_event with one dict per event, returns the best gens
+        of every island. '''
+    if topology not in TOPOLOGIES:
+        raise ValueError("unknown topology " + str(topology))
+    if island_size < 6 or island_size % 6:
+        raise ValueError("the island size has to be a multiple of 6")
+    inboxes = [multiprocessing.Queue() for island in range(islands)]
+    events = multiprocessing.Queue()
+    if topology == RING:
+        neighbours = [[(island + 1) % islands] if islands > 1 else [] for island in range(islands)]
+    else:
+        neighbours = [[other for other in range(islands) if other != island] for island in range(islands)]
+    senders = [sum(island in targets for targets in neighbours) for island in range(islands)]
+    settings = (SEARCH_MODE, GAME_TIME, INCREMENT)
+    processes = []
+    for island in range(islands):
+        process = multiprocessing.Process(target=island_worker, daemon=True,
+                                          args=(island, island_size, epochs, migration_interval, migrants,
+                                                inboxes[island], [inboxes[target] for target in neighbours[island]],
+                                                senders[island], events, settings, seed, pc, pm))
+        process.start()
+        processes.append(process)
+
+    best = {}
+    try:
+        while len(best) < islands:
+            event = events.get()
+            if event['event'] == 'error':
+                raise RuntimeError("island " + str(event['island']) + " failed: " + event['error'])
+            if event['event'] == 'done':
+                best[event['island']] = event['best']
+            if on_event is not None:
+                on_event(event)
+    finally:
+        for process in processes:
+            if len(best) < islands:
+                process.terminate()
+            process.join()
+    return [gen for island in range(islands) for gen in best[island]]
+
+
+def create_weights(gen=None):
+    if gen is None:
+        gen = [120, 20, 3, 4, 5, 6, 7, 8]
+
+    for i in range(8):
+        for j in range(8):
+            if RES[i][j] == 120:
+                RES[i][j] = gen[0]
+            if RES[i][j] == 20:
+                RES[i][j] = gen[1]
+            if RES[i][j] == 15:
+                RES[i][j] = gen[2]
+            if RES[i][j] == 5:
+                RES[i][j] = gen[3]
+            if RES[i][j] == 3:
+                RES[i][j] = gen[4]
+            if RES[i][j] == -5:
+                RES[i][j] = gen[5]
+            if RES[i][j] == -20:
+                RES[i][j] = gen[6]
+            if RES[i][j] == -40:
+                RES[i][j] = gen[7]
+
+    return RES
+
+
+def print_list(list):
+    for j in range(len(list)):
+        # print(str(list[j].gen))
+        log(str(list[j].gen) + " Margin = " + str(list[j].margin))
+    log()
+
+
+# crossover(0, 0)
+# population_initialization(10)
+
+# print_list(POPULATION)
+
+# res = mutation(POPULATION, 10)
+# print_list(res)
+
+# mutation_sorted = sorted(POPULATION, key=lambda x: x.margin, reverse=False)
+# print_list(mutation_sorted)
+
+# crossovered_sorted = crossover(POPULATION, 5)
+# print_list(crossovered_sorted)
+
+# current_game = othello.OthelloGame(ROWS, COLUMNS, othello.BLACK)
+# current_game.ai_vs_ai()
+
+if __name__ == '__main__':
+    genetic_algorithm(60)
+
+# ss = [4, 2, 3, 4, 5]
+# ss2 = [4, 2, 3, 4, 5]
+# ss1 = list.copy(ss)
+# del ss[0]
+# print(ss)
+# print(ss1)
+# print(ss2.sort() == ss.sort())
@@ -1,5 +1,7 @@
 import othello
 import models
+import search
+import timecontrol
 import tkinter
 import time
 import time
@@ -9,6 +11,11 @@ from PIL import ImageTk, Image, ImageOps
 ROWS = 8
 COLUMNS = 8
 FIRST_PLAYER = othello.BLACK
+GAME_TIME = 300  # seconds on the AI's clock for the whole game
+INCREMENT = 2  # seconds added to the AI's clock after every move
+HINTS = 3  # number of moves shown when the hint key is pressed
+SEARCH_MODE = search.PVS  # any of search.ENGINE_MODES, search.MCTS plays with Monte Carlo tree search
+PONDER = True  # the AI searches while the player thinks, in every mode but search.ALPHA_BETA
 
 # GUI Constants
 BACKGROUND_COLOR = models.BACKGROUND_COLOR
@@ -93,7 +100,9 @@ class GameGUI:
         self.columns = COLUMNS
         self.first_player = FIRST_PLAYER
 
-        self.game = othello.OthelloGame(self.rows, self.columns, self.first_player)
+        self.game = othello.OthelloGame(self.rows, self.columns, self.first_player,
+                                        time_manager=timecontrol.TimeManager(GAME_TIME, INCREMENT),
+                                        search_mode=SEARCH_MODE, ponder=PONDER)
 
         # Board game setting
         self.window = tkinter.Tk()
@@ -107,6 +116,7 @@ class GameGUI:
         # Bind my game board with these two events.
         self.board.board.bind('<Configure>', self.on_board_resized)
         self.board.board.bind('<Button-1>', self.on_board_clicked)
+        self.window.bind('<h>', self.on_hint_key_pressed)
 
         # restart button
         self.restart_icon = Image.open("assets/restart.jpg")
@@ -150,7 +160,10 @@ class GameGUI:
 
     def new_game(self) -> None:
         ''' Creates a new game'''
-        self.game = othello.OthelloGame(self.rows, self.columns, self.first_player)
+        self.game.stop_pondering()
+        self.game = othello.OthelloGame(self.rows, self.columns, self.first_player,
+                                        time_manager=timecontrol.TimeManager(GAME_TIME, INCREMENT),
+                                        search_mode=SEARCH_MODE, ponder=PONDER)
         self.board.new_game_settings(self.game)
         self.board.redraw_board()
         self.black_score.update_score(self.game)
@@ -159,6 +172,7 @@ class GameGUI:
 
     def exit_button_clicked(self, event: tkinter.Event) -> None:
         ''' Exit the game'''
+        self.game.stop_pondering()
         self.window.destroy()
         HomeGUI().start()
 
@@ -184,12 +198,20 @@ class GameGUI:
             self.update_board()
 
             if self.game.is_game_over():
+                self.game.stop_pondering()
                 self.player_turn.display_winner(self.game.winner())
             else:
                 self.player_turn.switch_turn(self.game)
         except:
             pass
 
+    def on_hint_key_pressed(self, event: tkinter.Event) -> None:
+        ''' Shows the scores of the best moves of the player to move '''
+        if self.game.is_game_over():
+            return
+        self.board.redraw_board()
+        self.board.draw_hints(self.game.get_multi_pv_moves(self.game.turn, HINTS))
+
     def update_board(self):
         self.board.update_game_state(self.game)
         self.board.redraw_board()
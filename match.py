@@ -0,0 +1,229 @@
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import bitboard
+import mcts
+import othello
+import search
+
+WORKERS = os.cpu_count() or 1
+OPENING_PLIES = 4  # plies of the generated openings
+BALANCE_DEPTH = 4  # depth of the search that picks balanced openings
+BALANCE_MARGIN = 20  # largest score of an opening that still counts as balanced
+PRIOR_GAMES = 1  # one virtual win and one virtual loss keep the variance sane in short matches
+
+
+class EngineConfig:
+
+    def __init__(self, name, mode=search.PVS, depth=othello.SEARCH_DEPTH, time_limit=None, weights=None):
+        ''' One side of a match: search mode, depth, seconds per move and weight table '''
+        self.name = name
+        self.mode = mode
+        self.depth = depth
+        self.time_limit = time_limit
+        self.weights = weights if weights is not None else othello.SQUARE_WEIGHTS
+
+    @classmethod
+    def parse(cls, name, text):
+        ''' Reads a config like "mode=mtdf,depth=6,time=0.5,weights=tuned.json" '''
+        options = dict(item.split('=', 1) for item in text.split(',') if item)
+        weights = None
+        if 'weights' in options:
+            with open(options['weights']) as file:
+                weights = json.load(file)
+        time_limit = float(options['time']) if 'time' in options else None
+        return cls(name, options.get('mode', search.PVS), int(options.get('depth', othello.SEARCH_DEPTH)),
+                   time_limit, weights)
+
+    def choose(self, own: int, opponent: int, turn: str) -> int:
+        ''' Returns the move bit this engine plays '''
+        geometry = bitboard.geometry(8, 8)
+        if self.mode == search.ALPHA_BETA:
+            game = othello.OthelloGame.from_bitboards(8, 8, turn, own, opponent, black_weights=self.weights,
+                                                      white_weights=self.weights)
+            time_limit = self.time_limit if self.time_limit is not None else othello.TIME_LIMIT
+            move = game.minimax_alpha_beta(turn, self.depth, othello.MIN_VALUE, othello.MAX_VALUE, time.time(),
+                                           time_limit)[1]
+            return geometry.bit(*move)
+        if self.mode == search.MCTS:
+            # playouts only stop on the clock or their default count, the depth is not used
+            return geometry.bit(*mcts.MCTS(8, 8).think(own, opponent, self.time_limit).move)
+        engine = search.Search(8, 8, self.weights, self.mode)
+        return geometry.bit(*engine.think(own, opponent, self.depth, self.time_limit).move)
+
+
+def play_game(black: EngineConfig, white: EngineConfig, opening: [int]) -> float:
+    ''' Plays a game from the opening moves and returns black's score: 1, 0.5 or 0 '''
+    opening = list(opening)
+
+    def choose(own, opponent, turn, moves):
+        if opening:
+            return opening.pop(0)
+        return (black if turn == othello.BLACK else white).choose(own, opponent, turn)
+
+    own, opponent, turn = othello.play_from_start(choose)
+    black_beads, white_beads = (own, opponent) if turn == othello.BLACK else (opponent, own)
+    margin = bitboard.count(black_beads) - bitboard.count(white_beads)
+    return 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+
+
+def play_pair(first: EngineConfig, second: EngineConfig, opening: [int]) -> tuple:
+    ''' Plays the opening twice with the colors swapped, returns first's two scores '''
+    return play_game(first, second, opening), 1 - play_game(second, first, opening)
+
+
+def balanced_openings(plies=OPENING_PLIES, depth=BALANCE_DEPTH, margin=BALANCE_MARGIN) -> [[int]]:
+    ''' Returns every move sequence of the given length whose position a search scores as even '''
+    geometry = bitboard.geometry(8, 8)
+    engine = search.Search(8, 8, othello.SQUARE_WEIGHTS)
+    start = othello.OthelloGame(8, 8, othello.BLACK).bitboards(othello.BLACK)
+    lines = [([], start)]
+    for ply in range(plies):
+        lines = [(moves + [move], tuple(reversed(geometry.play(own, opponent, move))))
+                 for moves, (own, opponent) in lines for move in bitboard.bits(geometry.legal_moves(own, opponent))]
+    openings = []
+    for moves, (own, opponent) in lines:
+        if abs(engine.think(own, opponent, depth).score) <= margin:
+            openings.append(moves)
+    return openings
+
+
+def read_openings(path: str) -> [[int]]:
+    ''' Reads one opening per line in a1-h8 notation '''
+    geometry = bitboard.geometry(8, 8)
+    openings = []
+    with open(path) as file:
+        for line in file:
+            text = ''.join(line.split()).lower()
+            if text:
+                openings.append([geometry.bit(int(text[i + 1]) - 1, ord(text[i]) - ord('a'))
+                                 for i in range(0, len(text), 2)])
+    return openings
+
+
+def elo_to_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def score_to_elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+class SPRT:
+
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        ''' Sequential probability ratio test of H0: elo = elo0 against H1: elo = elo1 '''
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    def add(self, score: float) -> None:
+        if score == 1:
+            self.wins += 1
+        elif score == 0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def score_and_variance(self, prior=0) -> tuple:
+        ''' Returns the mean score per game and its variance per game, counting
+            prior extra wins and losses '''
+        wins = self.wins + prior
+        games = self.games() + 2 * prior
+        score = (wins + self.draws / 2) / games
+        variance = (wins + self.draws / 4) / games - score ** 2
+        return score, variance
+
+    def llr(self) -> float:
+        ''' Log likelihood ratio of H1 against H0, in the normal approximation '''
+        if not self.games():
+            return 0.0
+        score = self.score_and_variance()[0]
+        variance = self.score_and_variance(PRIOR_GAMES)[1]
+        score0 = elo_to_score(self.elo0)
+        score1 = elo_to_score(self.elo1)
+        return (score1 - score0) * (2 * score - score0 - score1) / (2 * variance / self.games())
+
+    def decision(self):
+        ''' Returns 'H1' when the change is accepted, 'H0' when rejected, None while undecided '''
+        llr = self.llr()
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def elo(self) -> tuple:
+        ''' Returns (elo, 95% error margin). The variance counts the PRIOR_GAMES like llr()
+            does, a match without losses or without wins would have a margin of 0 otherwise. '''
+        if not self.games():
+            return 0.0, float('inf')
+        score = self.score_and_variance()[0]
+        variance = self.score_and_variance(PRIOR_GAMES)[1]
+        deviation = math.sqrt(max(variance, 0) / self.games())
+        low = score_to_elo(score - 1.96 * deviation)
+        high = score_to_elo(score + 1.96 * deviation)
+        return score_to_elo(score), (high - low) / 2
+
+
+def run_match(first, second, openings, sprt, executor, workers=WORKERS, max_pairs=None, report=print) -> str:
+    ''' Plays opening pairs in parallel until the SPRT decides or the openings run out '''
+    openings = list(openings)
+    if max_pairs is not None:
+        openings = openings[:max_pairs]
+    pending = set()
+    decision = None
+    while (openings or pending) and decision is None:
+        while openings and len(pending) < workers * 2:
+            pending.add(executor.submit(play_pair, first, second, openings.pop(0)))
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            for score in future.result():
+                sprt.add(score)
+        decision = sprt.decision()
+        elo, margin = sprt.elo()
+        report('games {} +{} ={} -{} elo {:.1f} +- {:.1f} llr {:.2f} [{:.2f}, {:.2f}]'.format(
+            sprt.games(), sprt.wins, sprt.draws, sprt.losses, elo, margin, sprt.llr(), sprt.lower, sprt.upper))
+    for future in pending:
+        future.cancel()
+    return decision
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plays two engine configurations against each other')
+    parser.add_argument('first', help='config of the new engine, like "mode=mtdf,depth=6"')
+    parser.add_argument('second', help='config of the reference engine')
+    parser.add_argument('--openings', help='file with one opening per line, default balanced 4 ply openings')
+    parser.add_argument('--elo0', type=float, default=0.0)
+    parser.add_argument('--elo1', type=float, default=10.0)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--max-pairs', type=int)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    first = EngineConfig.parse('first', args.first)
+    second = EngineConfig.parse('second', args.second)
+    openings = read_openings(args.openings) if args.openings else balanced_openings()
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+    with ProcessPoolExecutor(args.workers) as executor:
+        decision = run_match(first, second, openings, sprt, executor, args.workers, args.max_pairs)
+    elo, margin = sprt.elo()
+    verdict = {'H1': 'accepted', 'H0': 'rejected', None: 'undecided'}[decision]
+    print('{}: elo {:.1f} +- {:.1f} after {} games'.format(verdict, elo, margin, sprt.games()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import math
+import random
+import time
+from array import array
+
+import bitboard
+import search
+
+EXPLORATION = 1.4  # UCT exploration constant
+CAPACITY = 200000  # nodes in the pool, the tree stops growing when it is full
+PLAYOUTS = 10000  # playouts of a search without a time limit
+BATCH_PLAYOUTS = 0  # playouts run together per leaf by the numpy batch backend, 0 runs them one at a time
+CORNER_BIAS = 0.5  # chance that a playout takes an available corner instead of a random move
+REUSE_DEPTH = 4  # plies below the previous root that are searched for the new position
+CHECK_EVERY = 15  # the clock is looked at once every CHECK_EVERY + 1 playouts
+
+NO_NODE = -1
+UNEXPANDED = -1
+
+
+class MCTS:
+
+    def __init__(self, rows: int, cols: int, capacity=CAPACITY, exploration=EXPLORATION, batch_playouts=BATCH_PLAYOUTS,
+                 corner_bias=CORNER_BIAS, seed=None):
+        ''' Monte Carlo tree search with UCT. The nodes live in flat arrays indexed by node
+            number, the children of a node are consecutive so a node only keeps the first one. '''
+        if batch_playouts and (rows, cols) != (8, 8):
+            raise ValueError('batched playouts need an 8x8 board')
+        self.geometry = bitboard.geometry(rows, cols)
+        self.capacity = capacity
+        self.exploration = exploration
+        self.batch_playouts = batch_playouts
+        self.corner_bias = corner_bias
+        self.generator = random.Random(seed)
+        self.corners = (self.geometry.bit(0, 0) | self.geometry.bit(0, cols - 1) | self.geometry.bit(rows - 1, 0) |
+                        self.geometry.bit(rows - 1, cols - 1))
+        # bitboards of boards bigger than 8x8 do not fit 64 bits, so they are kept in lists
+        self.own = [0] * capacity  # beads of the player to move in the node
+        self.opponent = [0] * capacity
+        self.move = [0] * capacity  # move bit that led to the node, 0 for a pass
+        self.parent = array('i', [NO_NODE]) * capacity
+        self.first_child = array('i', [0]) * capacity
+        self.children = array('i', [UNEXPANDED]) * capacity  # 0 once expanded for a finished game
+        self.visits = array('l', [0]) * capacity
+        self.wins = array('d', [0.0]) * capacity  # results of the player who moved into the node
+        self.size = 0
+        self.root = NO_NODE
+        self.playouts = 0
+        self.depth = 0  # deepest node reached by the selection
+        self.stopped = False
+        self.stop_event = None  # optional threading or multiprocessing Event that also stops the search
+        self.last_stats = None
+        self.total_playouts = 0  # over all the searches, for playouts per second figures
+        self.total_time = 0.0
+
+    def new_node(self, own: int, opponent: int, move: int, parent: int) -> int:
+        node = self.size
+        self.size += 1
+        self.own[node] = own
+        self.opponent[node] = opponent
+        self.move[node] = move
+        self.parent[node] = parent
+        self.children[node] = UNEXPANDED
+        self.visits[node] = 0
+        self.wins[node] = 0.0
+        return node
+
+    def expand(self, node: int) -> bool:
+        ''' Adds all the children of the node, returns False if the pool has no room for them '''
+        own = self.own[node]
+        opponent = self.opponent[node]
+        moves = self.geometry.legal_moves(own, opponent)
+        if not moves:
+            if not self.geometry.legal_moves(opponent, own):
+                self.children[node] = 0
+                return True
+            if self.size >= self.capacity:
+                return False
+            self.first_child[node] = self.new_node(opponent, own, 0, node)
+            self.children[node] = 1
+            return True
+        count = bitboard.count(moves)
+        if self.size + count > self.capacity:
+            return False
+        self.first_child[node] = self.size
+        self.children[node] = count
+        for move in bitboard.bits(moves):
+            new_own, new_opponent = self.geometry.play(own, opponent, move)
+            self.new_node(new_opponent, new_own, move, node)
+        return True
+
+    def select(self, node: int) -> int:
+        ''' Returns the child with the highest upper confidence bound, unvisited children first '''
+        first = self.first_child[node]
+        visits = self.visits
+        wins = self.wins
+        log_visits = math.log(visits[node])
+        best = first
+        best_value = -1.0
+        for child in range(first, first + self.children[node]):
+            if not visits[child]:
+                return child
+            value = wins[child] / visits[child] + self.exploration * math.sqrt(log_visits / visits[child])
+            if value > best_value:
+                best = child
+                best_value = value
+        return best
+
+    def playout(self, own: int, opponent: int) -> float:
+        ''' Plays random moves to the end, corners preferred, and returns 1, 0.5 or 0 for own '''
+        geometry = self.geometry
+        generator = self.generator
+        swapped = False
+        passed = False
+        while True:
+            moves = geometry.legal_moves(own, opponent)
+            if not moves:
+                if passed:
+                    break
+                passed = True
+            else:
+                passed = False
+                if moves & self.corners and generator.random() < self.corner_bias:
+                    moves &= self.corners
+                move = generator.choice(list(bitboard.bits(moves)))
+                own, opponent = geometry.play(own, opponent, move)
+            own, opponent = opponent, own
+            swapped = not swapped
+        if swapped:
+            own, opponent = opponent, own
+        margin = bitboard.count(own) - bitboard.count(opponent)
+        return 1.0 if margin > 0 else 0.0 if margin < 0 else 0.5
+
+    def batch_playout(self, own: int, opponent: int) -> float:
+        ''' Runs batch_playouts uniformly random playouts at once and returns own's total result '''
+        import numpy as np
+
+        import batch
+
+        games = batch.Batch(np.full(self.batch_playouts, own, dtype=np.uint64),
+                            np.full(self.batch_playouts, opponent, dtype=np.uint64),
+                            np.ones(self.batch_playouts, dtype=bool))
+        games.playout(np.random.default_rng(self.generator.getrandbits(64)))
+        margins = games.margins()
+        return float(np.count_nonzero(margins > 0) + np.count_nonzero(margins == 0) / 2)
+
+    def iterate(self) -> int:
+        ''' Runs one selection, expansion, playout and backpropagation, returns the playouts made '''
+        node = self.root
+        depth = 0
+        while self.children[node] > 0:
+            node = self.select(node)
+            depth += 1
+        if self.children[node] == UNEXPANDED and self.expand(node) and self.children[node]:
+            node = self.first_child[node]
+            depth += 1
+        self.depth = max(self.depth, depth)
+        if self.batch_playouts:
+            playouts = self.batch_playouts
+            result = self.batch_playout(self.own[node], self.opponent[node])
+        else:
+            playouts = 1
+            result = self.playout(self.own[node], self.opponent[node])
+        # result is for the player to move in node, wins count for the player who moved into it
+        while node != NO_NODE:
+            self.visits[node] += playouts
+            self.wins[node] += playouts - result
+            result = playouts - result
+            node = self.parent[node]
+        return playouts
+
+    def find(self, own: int, opponent: int) -> int:
+        ''' Returns the node of the position in the top of the previous tree, or NO_NODE '''
+        level = [self.root]
+        for depth in range(REUSE_DEPTH + 1):
+            next_level = []
+            for node in level:
+                if self.own[node] == own and self.opponent[node] == opponent:
+                    return node
+                if self.children[node] > 0:
+                    first = self.first_child[node]
+                    next_level.extend(range(first, first + self.children[node]))
+            level = next_level
+        return NO_NODE
+
+    def reroot(self, root: int) -> None:
+        ''' Moves the subtree of root to the front of the pool and drops everything else.
+            Nodes keep their order, so every node moves to a lower or the same index. '''
+        nodes = [root]
+        for node in nodes:
+            if self.children[node] > 0:
+                first = self.first_child[node]
+                nodes.extend(range(first, first + self.children[node]))
+        nodes.sort()
+        new_index = {old: new for new, old in enumerate(nodes)}
+        for new, old in enumerate(nodes):
+            self.own[new] = self.own[old]
+            self.opponent[new] = self.opponent[old]
+            self.move[new] = self.move[old]
+            self.parent[new] = new_index.get(self.parent[old], NO_NODE)
+            self.children[new] = self.children[old]
+            if self.children[old] > 0:
+                self.first_child[new] = new_index[self.first_child[old]]
+            self.visits[new] = self.visits[old]
+            self.wins[new] = self.wins[old]
+        self.parent[0] = NO_NODE
+        self.size = len(nodes)
+        self.root = 0
+
+    def stop(self) -> None:
+        ''' Asks a running search, possibly in another thread, to finish as soon as it can '''
+        self.stopped = True
+
+    def think(self, own: int, opponent: int, time_limit=None, start_time=None, max_playouts=None) -> search.SearchResult:
+        ''' Runs playouts until the time or the playouts run out. The tree of the previous
+            search is kept if it contains the position. The result's score is the expected
+            result of the move in percent, its nodes are the playouts. '''
+        if start_time is None:
+            start_time = time.time()
+        if max_playouts is None and time_limit is None:
+            max_playouts = PLAYOUTS
+        deadline = start_time + time_limit if time_limit is not None else None
+        self.stopped = False
+        self.depth = 0
+        node = self.find(own, opponent) if self.root != NO_NODE else NO_NODE
+        reused = self.visits[node] if node != NO_NODE else 0
+        if node != NO_NODE:
+            self.reroot(node)
+        else:
+            self.size = 0
+            self.root = self.new_node(own, opponent, 0, NO_NODE)
+        self.playouts = 0
+        iterations = 0
+        while max_playouts is None or self.playouts < max_playouts:
+            if not iterations & CHECK_EVERY:
+                if self.stopped or (self.stop_event is not None and self.stop_event.is_set()):
+                    break
+                if deadline is not None and time.time() > deadline:
+                    break
+            self.playouts += self.iterate()
+            iterations += 1
+            if self.children[self.root] <= 1:
+                # a single move or a pass needs no search
+                break
+        elapsed = time.time() - start_time
+        self.total_playouts += self.playouts
+        self.total_time += elapsed
+        self.last_stats = {'playouts': self.playouts, 'time': elapsed, 'playouts_per_second':
+                           self.playouts / max(elapsed, 1e-9), 'tree': self.size, 'reused': reused}
+        best = self.best_child()
+        if best == NO_NODE or not self.move[best]:
+            return search.SearchResult(None, 0, self.depth, self.playouts, elapsed)
+        score = round(100 * self.wins[best] / max(self.visits[best], 1))
+        return search.SearchResult(self.geometry.cell(self.move[best]), score, self.depth, self.playouts, elapsed)
+
+    def best_child(self) -> int:
+        ''' Returns the most visited child of the root, or NO_NODE in a finished game '''
+        if self.children[self.root] <= 0:
+            return NO_NODE
+        first = self.first_child[self.root]
+        return max(range(first, first + self.children[self.root]), key=self.visits.__getitem__)
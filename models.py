@@ -51,6 +51,16 @@ class GameBoard:
                                (row + 1) * self.get_cell_height() - 5,
                                fill=PLAYERS[self.game.current_board[row][col]])
 
+    def draw_hints(self, hints) -> None:
+        ''' Writes the score of every hinted move in its cell, the best one highlighted '''
+        for rank, hint in enumerate(hints):
+            row, col = hint.move
+            self.board.create_text((col + 0.5) * self.get_cell_width(),
+                                   (row + 0.5) * self.get_cell_height(),
+                                   text=str(hint.score),
+                                   fill='yellow' if rank == 0 else 'white',
+                                   font=('Comic Sans MS', 14))
+
     def update_game_state(self, game: othello.OthelloGame) -> None:
         ''' Updates our current _game_state to the specified one in the argument '''
         self.game = game
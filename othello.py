@@ -3,9 +3,17 @@ from copy import deepcopy
 import time
 import random
 
+import bitboard
+import mcts
+import ponder
+import search
+
 MIN_VALUE = -100000
 MAX_VALUE = 100000
 
+SEARCH_DEPTH = 5  # depth of the fixed-depth search
+TIME_LIMIT = 4.8  # seconds per move when no time manager is used
+
 BLACK = 'B'  # indicates the black player bead
 WHITE = 'W'  # indicates the white player bead
 NONE = '-'  # empty
@@ -33,16 +41,72 @@ SQUARE_WEIGHTS = [
 
 ]
 
+# Weight of each square class in the order used by the evolution genes:
+# corner, A-square, center corner, B-square, center, inner edge, C-square, X-square
+CLASS_WEIGHTS = [120, 20, 15, 5, 3, -5, -20, -40]
+
+
+def generate_weights(rows: int, cols: int, class_weights=None) -> [[int]]:
+    ''' Generates a weight table for any board size. Squares are classified by their
+        distance to the nearest edges, which gives back SQUARE_WEIGHTS on 8x8. '''
+    if class_weights is None:
+        class_weights = CLASS_WEIGHTS
+    corner, a_square, center_corner, b_square, center, inner_edge, c_square, x_square = class_weights
+    weights = []
+    for row in range(rows):
+        weights.append([])
+        for col in range(cols):
+            near, far = sorted((min(row, rows - 1 - row), min(col, cols - 1 - col)))
+            if near == 0:
+                value = [corner, c_square, a_square][far] if far < 3 else b_square
+            elif near == 1:
+                value = x_square if far == 1 else inner_edge
+            elif near == 2:
+                value = center_corner if far == 2 else center
+            else:
+                value = center
+            weights[-1].append(value)
+    return weights
+
+
+def opposite_turn(turn: str) -> str:
+    ''' Returns the player of the opposite player '''
+    return WHITE if turn == BLACK else BLACK
+
+
+def play_from_start(choose, rows=8, cols=8) -> tuple:
+    ''' Plays a game on bitboards from the starting position, a player without a move passes.
+        choose(own, opponent, turn, moves) gets every position where turn has the legal move
+        bits moves, and returns the move bit to play or None to end the game there.
+        Returns the (own, opponent, turn) the game ended in. '''
+    geometry = bitboard.geometry(rows, cols)
+    own, opponent = OthelloGame(rows, cols, BLACK).bitboards(BLACK)
+    turn = BLACK
+    while True:
+        moves = geometry.legal_moves(own, opponent)
+        if not moves:
+            if not geometry.legal_moves(opponent, own):
+                return own, opponent, turn
+            own, opponent, turn = opponent, own, opposite_turn(turn)
+            continue
+        move = choose(own, opponent, turn, moves)
+        if move is None:
+            return own, opponent, turn
+        own, opponent = geometry.play(own, opponent, move)
+        own, opponent, turn = opponent, own, opposite_turn(turn)
+
 
 class OthelloGame:
 
     def __init__(self, rows: int, cols: int, turn: str, winner_color=None, black_score=0, white_score=0,
-                 black_weights=None, white_weights=None, first_player=BLACK):
+                 black_weights=None, white_weights=None, first_player=BLACK, pattern_table=None, time_manager=None,
+                 search_mode=search.ALPHA_BETA, probcut=None, engine_pool=None, smp=None, ponder=False):
         ''' Initialize all of the games settings and creates the board. '''
+        default_weights = SQUARE_WEIGHTS if (rows, cols) == (8, 8) else generate_weights(rows, cols)
         if black_weights is None:
-            black_weights = SQUARE_WEIGHTS
+            black_weights = default_weights
         if white_weights is None:
-            white_weights = SQUARE_WEIGHTS
+            white_weights = default_weights
         self.black_weights = black_weights
         self.white_weights = white_weights
         self.winner_color = winner_color
@@ -53,7 +117,34 @@ class OthelloGame:
         self.rows = rows
         self.cols = cols
         self.turn = turn
-        self.current_board = self.new_game_board(rows, cols)
+        # optional patterns.PatternTable, replaces the square weights in utility_function, so
+        # only the search.ALPHA_BETA mode uses it, the search.Search modes keep the square weights
+        self.pattern_table = pattern_table
+        self.pattern_indices = None
+        # optional timecontrol.TimeManager that shares a game clock between the AI moves
+        self.time_manager = time_manager
+        # search.ALPHA_BETA is minimax_alpha_beta, search.MCTS an mcts.MCTS per player and
+        # the other search.MODES a search.Search per player
+        self.search_mode = search_mode
+        self.probcut = probcut  # optional probcut.ProbCut for the negamax modes
+        # optional pool.EnginePool whose tables are shared with the other games of the pool
+        self.engine_pool = engine_pool
+        # optional smp.LazySMP whose helper processes join the negamax searches
+        self.smp = smp
+        self.engines = {}
+        # search on the opponent's time, for the negamax modes and MCTS without smp, not in ai_vs_ai
+        self.ponder = ponder
+        self.ponderers = {}
+        self.nodes = 0  # positions minimax_alpha_beta visited from this game, children included
+        self.set_game_board(self.new_game_board(rows, cols))
+
+    @classmethod
+    def from_bitboards(cls, rows: int, cols: int, turn: str, own: int, opponent: int, **options):
+        ''' Returns a game of the position where turn has the own beads and is to move,
+            options go to the constructor '''
+        game = cls(rows, cols, turn, **options)
+        game.set_game_board(bitboard.geometry(rows, cols).to_board(own, opponent, turn, opposite_turn(turn), NONE))
+        return game
 
     def new_game_board(self, rows: int, cols: int) -> [[str]]:
         ''' Creates the Othello Game board with specified dimensions. '''
@@ -75,8 +166,12 @@ class OthelloGame:
 
         return board
 
-    def set_game_board(self, new_board):
+    def set_game_board(self, new_board, pattern_indices=None):
         self.current_board = new_board
+        if self.pattern_table is not None:
+            if pattern_indices is None:
+                pattern_indices = self.pattern_table.indices(new_board)
+            self.pattern_indices = pattern_indices
 
     def set_winner(self, winner, score):
         self.winner = winner
@@ -84,7 +179,7 @@ class OthelloGame:
 
     def opposite_turn(self, turn: str) -> str:
         ''' Returns the player of the opposite player '''
-        return {BLACK: WHITE, WHITE: BLACK}[turn]
+        return opposite_turn(turn)
 
     def move(self, row: int, col: int, real=True, ai_vs_ai=False):
         self.require_valid_empty_space_to_move(row, col)
@@ -99,13 +194,16 @@ class OthelloGame:
 
         if next_turn != self.turn:
             self.current_board[row][col] = self.turn
+            if self.pattern_table is not None:
+                self.pattern_table.update(self.pattern_indices, row, col, NONE, self.turn)
             if self.can_move(next_turn):
                 self.turn = self.opposite_turn(self.turn)  # switches the turn
                 # if self.turn == WHITE and real:
                 if self.turn == self.opposite_turn(self.first_player) and real:
                     start_time = time.time()
                     row, col = self.get_minimax_move_alpha(self.turn, start_time)
-                    self.move(row, col)
+                    if (row, col) != (None, None):
+                        self.move(row, col)
 
 
 
@@ -130,7 +228,10 @@ class OthelloGame:
 
     def flip_cell(self, row: int, col: int) -> None:
         ''' Flips the specified cell over to the other color '''
-        self.current_board[row][col] = self.opposite_turn(self.current_board[row][col])
+        old_color = self.current_board[row][col]
+        self.current_board[row][col] = self.opposite_turn(old_color)
+        if self.pattern_table is not None:
+            self.pattern_table.update(self.pattern_indices, row, col, old_color, self.current_board[row][col])
 
     def adjacent_opposite_color_directions(self, row: int, col: int, turn: str) -> [tuple]:
         ''' Looks up to a possible of 8 directions surrounding the given move. If any of the
@@ -185,14 +286,12 @@ class OthelloGame:
         ''' Looks at all the empty cells in the board and checks to
             see if the specified player can move in any of the cells.
             Returns True if it can move; False otherwise. '''
-        for row in range(self.rows):
-            for col in range(self.cols):
-                if self.current_board[row][col] == NONE:
-                    possible_directions = self.adjacent_opposite_color_directions(row, col, turn)
-                    for direction in possible_directions:
-                        if self.is_valid_directional_move(row, col, direction[0], direction[1], turn):
-                            return True
-        return False
+        own, opponent = self.bitboards(turn)
+        return bitboard.geometry(self.rows, self.cols).legal_moves(own, opponent) != 0
+
+    def bitboards(self, turn: str) -> tuple:
+        ''' Returns the (own, opponent) bitboards of the specified player '''
+        return bitboard.geometry(self.rows, self.cols).from_board(self.current_board, turn, self.opposite_turn(turn))
 
     def is_game_over(self) -> bool:
         ''' Looks through every empty cell and determines if there are
@@ -237,6 +336,9 @@ class OthelloGame:
 
     def utility_function(self, turn):
         ''' Returns the current score based on the weight of a cell and its color '''
+        if self.pattern_table is not None:
+            return self.pattern_utility(turn)
+
         our_cells = self.get_cells_with_color(turn)
         our_cells_value = 0
         opponent_cells = self.get_cells_with_color(self.opposite_turn(turn))
@@ -256,6 +358,14 @@ class OthelloGame:
 
         return our_cells_value - opponent_cells_value
 
+    def pattern_utility(self, turn):
+        ''' Returns the current score based on the pattern table lookups. It is from
+            BLACK's point of view whoever is to move, minimax_alpha_beta maximises for BLACK. '''
+        discs = 4
+        if self.pattern_table.phases > 1:
+            discs = self.rows * self.cols - self.get_total_cells(NONE)
+        return self.pattern_table.score(self.pattern_indices, BLACK, discs)
+
     def is_valid_move(self, row: int, col: int, row_dir: int, col_dir: int, turn: str):
         ''' Returns a cell that is a correct move for a given color '''
         current_row = row + row_dir
@@ -376,7 +486,7 @@ class OthelloGame:
             all_possible_moves.difference_update(result)
             # print(all_possible_moves)
             number_of_randoms = min(number_of_randoms, len(all_possible_moves))
-            random_moves = random.sample(all_possible_moves, number_of_randoms)
+            random_moves = random.sample(sorted(all_possible_moves), number_of_randoms)
             # print("Random Moves:")
             # print(random_moves)
             result.update(random_moves)
@@ -387,15 +497,19 @@ class OthelloGame:
         ''' Returns a copy of the current game for minimax '''
         new_board = deepcopy(self.current_board)
         new_game = OthelloGame(self.rows, self.cols, turn, black_weights=self.black_weights,
-                               white_weights=self.white_weights)
-        new_game.set_game_board(new_board)
+                               white_weights=self.white_weights, pattern_table=self.pattern_table)
+        pattern_indices = None
+        if self.pattern_indices is not None:
+            pattern_indices = list(self.pattern_indices)
+        new_game.set_game_board(new_board, pattern_indices)
 
         return new_game
 
-    def minimax_alpha_beta(self, turn, depth, alpha, beta, start_time):
+    def minimax_alpha_beta(self, turn, depth, alpha, beta, start_time, time_limit=TIME_LIMIT):
         # print("Turn = " + turn)
+        self.nodes += 1
 
-        time_expired = time.time() - start_time > 4.8
+        time_expired = time.time() - start_time > time_limit
         if time_expired:
             # print("GAME OVER FOR TIME EXPIRED")
             return self.utility_function(turn), None
@@ -424,7 +538,9 @@ class OthelloGame:
                 new_game = self.copy_game(turn)
                 new_game.move(move[0], move[1], False)
 
-                try_tuple = new_game.minimax_alpha_beta(self.opposite_turn(turn), depth - 1, alpha, beta, start_time)
+                try_tuple = new_game.minimax_alpha_beta(self.opposite_turn(turn), depth - 1, alpha, beta, start_time,
+                                                        time_limit)
+                self.nodes += new_game.nodes
                 try_score = try_tuple[0]
                 if try_score > best_score:
                     best_score = try_score
@@ -443,7 +559,9 @@ class OthelloGame:
                 new_game = self.copy_game(turn)
                 new_game.move(move[0], move[1], False)
 
-                try_tuple = new_game.minimax_alpha_beta(self.opposite_turn(turn), depth - 1, alpha, beta, start_time)
+                try_tuple = new_game.minimax_alpha_beta(self.opposite_turn(turn), depth - 1, alpha, beta, start_time,
+                                                        time_limit)
+                self.nodes += new_game.nodes
                 try_score = try_tuple[0]
                 if try_score < best_score:
                     best_score = try_score
@@ -457,9 +575,108 @@ class OthelloGame:
 
         return best_score, best_move
 
+    def engine(self, turn: str) -> search.Search:
+        ''' Returns the searcher of the specified player, it keeps its transposition
+            table or its tree from one move to the next '''
+        if turn not in self.engines:
+            weights = self.black_weights if turn == BLACK else self.white_weights
+            if self.search_mode == search.MCTS:
+                self.engines[turn] = mcts.MCTS(self.rows, self.cols)
+            elif self.engine_pool is not None:
+                self.engines[turn] = self.engine_pool.engine(self.rows, self.cols, weights, self.search_mode,
+                                                             self.probcut)
+            else:
+                self.engines[turn] = search.Search(self.rows, self.cols, weights, self.search_mode,
+                                                   probcut=self.probcut)
+        return self.engines[turn]
+
+    def search_iteration(self, turn, depth, start_time, time_limit):
+        ''' Runs one fixed-depth search with the selected mode.
+            Returns (move, finished), finished is False if the time ran out. '''
+        if self.search_mode == search.ALPHA_BETA:
+            move = self.minimax_alpha_beta(turn, depth, MIN_VALUE, MAX_VALUE, start_time, time_limit)[1]
+            return move, time.time() - start_time <= time_limit
+        own, opponent = self.bitboards(turn)
+        if self.smp is not None:
+            weights = self.black_weights if turn == BLACK else self.white_weights
+            try:
+                move = self.smp.search(self.rows, self.cols, weights, own, opponent, depth, start_time + time_limit,
+                                       self.search_mode)[1]
+            except search.SearchTimeout:
+                return None, False
+            return bitboard.geometry(self.rows, self.cols).cell(move) if move else None, True
+        engine = self.engine(turn)
+        engine.deadline = start_time + time_limit
+        try:
+            move = engine.search(own, opponent, depth)[1]
+        except search.SearchTimeout:
+            return None, False
+        finally:
+            engine.deadline = None
+        return engine.geometry.cell(move) if move else None, True
+
+    def get_multi_pv_moves(self, turn, count, max_depth=SEARCH_DEPTH, time_limit=TIME_LIMIT):
+        ''' Returns a search.SearchResult with score and principal variation for each of
+            the best count moves of the specified player, best first '''
+        own, opponent = self.bitboards(turn)
+        if self.search_mode in (search.ALPHA_BETA, search.MCTS):
+            engine = search.Search(self.rows, self.cols, self.black_weights if turn == BLACK else self.white_weights)
+        else:
+            engine = self.engine(turn)
+        return engine.multi_pv(own, opponent, count, max_depth, time_limit)
+
+    def ponderer(self, turn: str):
+        ''' Returns the ponder.Ponderer of the specified player, or None if it does not ponder '''
+        if not self.ponder or self.search_mode == search.ALPHA_BETA or self.smp is not None:
+            return None
+        if turn not in self.ponderers:
+            self.ponderers[turn] = ponder.Ponderer(self.engine(turn))
+        return self.ponderers[turn]
+
+    def stop_pondering(self) -> None:
+        for ponderer in self.ponderers.values():
+            ponderer.stop()
+
     def get_minimax_move_alpha(self, turn, start_time, test=False):
-        ''' Returns the best move chosen by minimax function '''
-        move = self.minimax_alpha_beta(turn, 5, MIN_VALUE, MAX_VALUE, start_time)[1]
+        ''' Returns the best move chosen by minimax function. With pondering the
+            search continues on the opponent's time after the move is chosen. '''
+        ponderer = self.ponderer(turn)
+        if ponderer is None:
+            return self.choose_move(turn, start_time)
+        own, opponent = self.bitboards(turn)
+        move = self.choose_move(turn, start_time, ponderer.finish(own, opponent))
+        if move != (None, None):
+            geometry = bitboard.geometry(self.rows, self.cols)
+            own, opponent = geometry.play(own, opponent, geometry.bit(*move))
+            ponderer.start(opponent, own)
+        return move
+
+    def choose_move(self, turn, start_time, pondered=None):
+        ''' Returns the move of the selected search. pondered is the (depth, score, move bit)
+            of a ponder search of this position, its move is played at once when it is
+            at least as deep as the search would go. '''
+        if pondered is not None and not pondered[2]:
+            pondered = None
+        if self.search_mode == search.MCTS:
+            return self.get_mcts_move(turn, start_time)
+        if self.time_manager is not None:
+            if pondered is not None:
+                pondered = (pondered[0], bitboard.geometry(self.rows, self.cols).cell(pondered[2]))
+            return self.time_manager.choose_move(self, turn, pondered=pondered)
+        if self.search_mode != search.ALPHA_BETA:
+            own, opponent = self.bitboards(turn)
+            if pondered is not None and pondered[0] >= SEARCH_DEPTH:
+                return bitboard.geometry(self.rows, self.cols).cell(pondered[2])
+            if self.smp is not None:
+                weights = self.black_weights if turn == BLACK else self.white_weights
+                move = self.smp.think(self.rows, self.cols, weights, own, opponent, SEARCH_DEPTH, TIME_LIMIT,
+                                      start_time, self.search_mode).move
+            else:
+                move = self.engine(turn).think(own, opponent, SEARCH_DEPTH, TIME_LIMIT, start_time).move
+            if move is None:
+                return None, None
+            return move
+        move = self.minimax_alpha_beta(turn, SEARCH_DEPTH, MIN_VALUE, MAX_VALUE, start_time)[1]
         # print("%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%%")
         # print(self.turn)
         # print("CHOSEN MOVE = " + str(move))
@@ -470,17 +687,42 @@ class OthelloGame:
             return None, None
         return move
 
-    def ai_vs_ai(self):
-        while not self.is_game_over():
-            start_time = time.time()
-            row, col = self.get_minimax_move_alpha(self.first_player, start_time, test=True)
-            if (row, col) == (None, None):
-                break
-            # print("===============================================================================")
-            # print(row, col)
-            # print("===============================================================================")
-            self.move(row, col)
-            # print("==================================MOVED========================================")
+    def get_mcts_move(self, turn, start_time):
+        ''' Returns the move chosen by Monte Carlo tree search, with the time manager's
+            soft limit as the time budget when there is one '''
+        own, opponent = self.bitboards(turn)
+        time_limit = TIME_LIMIT
+        if self.time_manager is not None:
+            start_time = self.time_manager.start(turn)
+            time_limit = self.time_manager.allocate(turn, self.get_total_cells(NONE))[0]
+        engine = self.engine(turn)
+        move = engine.think(own, opponent, time_limit, start_time).move
+        if self.time_manager is not None:
+            self.time_manager.last_stats = dict(engine.last_stats, soft=time_limit)
+            self.time_manager.stop(turn, start_time)
+        if move is None:
+            return None, None
+        return move
+
+    def ai_vs_ai(self, time_manager=None):
+        if time_manager is not None:
+            self.time_manager = time_manager
+        # both players search in this process, a ponder thread would only slow down the side to move
+        ponder, self.ponder = self.ponder, False
+        try:
+            while not self.is_game_over():
+                start_time = time.time()
+                row, col = self.get_minimax_move_alpha(self.first_player, start_time, test=True)
+                if (row, col) == (None, None):
+                    break
+                # print("===============================================================================")
+                # print(row, col)
+                # print("===============================================================================")
+                self.move(row, col)
+                # print("==================================MOVED========================================")
+        finally:
+            self.ponder = ponder
+        self.stop_pondering()
         self.winner_color = self.winner()
         # print(self.winner_color)
         # print(self.black_score)
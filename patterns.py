@@ -0,0 +1,168 @@
+import mmap
+import struct
+import sys
+from array import array
+
+import othello
+
+# Pattern evaluation only works for the standard 8x8 board
+SIZE = 8
+
+# Tables hold integers in 1/SCALE units so seeded tables keep their precision
+SCALE = 16
+
+# File header: magic, version, number of game phases
+MAGIC = b'OTPT'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+
+DEFAULT_PATTERN_FILE = 'patterns.bin'
+
+# digit of a cell inside a base-3 pattern index
+DIGITS = {othello.NONE: 0, othello.BLACK: 1, othello.WHITE: 2}
+
+# One representative of every pattern, the other instances are its symmetries
+PATTERN_SHAPES = [
+    ('edge_2x', [(0, col) for col in range(8)] + [(1, 1), (1, 6)]),
+    ('corner_2x5', [(row, col) for row in range(2) for col in range(5)]),
+    ('corner_3x3', [(row, col) for row in range(3) for col in range(3)]),
+    ('row_2', [(1, col) for col in range(8)]),
+    ('row_3', [(2, col) for col in range(8)]),
+    ('row_4', [(3, col) for col in range(8)]),
+    ('diag_8', [(i, i) for i in range(8)]),
+    ('diag_7', [(i, i + 1) for i in range(7)]),
+    ('diag_6', [(i, i + 2) for i in range(6)]),
+    ('diag_5', [(i, i + 3) for i in range(5)]),
+    ('diag_4', [(i, i + 4) for i in range(4)]),
+]
+
+SYMMETRIES = [
+    lambda r, c: (r, c),
+    lambda r, c: (c, 7 - r),
+    lambda r, c: (7 - r, 7 - c),
+    lambda r, c: (7 - c, r),
+    lambda r, c: (r, 7 - c),
+    lambda r, c: (7 - r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (7 - c, 7 - r),
+]
+
+
+def build_instances():
+    ''' Returns (shape_offsets, table_size, instances) where every instance is a
+        (shape_number, squares) tuple for one symmetric copy of a pattern '''
+    offsets = []
+    size = 0
+    instances = []
+    for number, (name, squares) in enumerate(PATTERN_SHAPES):
+        offsets.append(size)
+        size += 3 ** len(squares)
+        seen = set()
+        for symmetry in SYMMETRIES:
+            moved = [symmetry(row, col) for row, col in squares]
+            if frozenset(moved) in seen:
+                continue
+            seen.add(frozenset(moved))
+            instances.append((number, moved))
+    return offsets, size, instances
+
+
+SHAPE_OFFSETS, PHASE_SIZE, INSTANCES = build_instances()
+
+# For every square: the (instance, power of 3) pairs that have to change when it changes
+SQUARE_REFS = [[[] for col in range(SIZE)] for row in range(SIZE)]
+for instance_number, (shape_number, squares) in enumerate(INSTANCES):
+    for position, (row, col) in enumerate(squares):
+        SQUARE_REFS[row][col].append((instance_number, 3 ** position))
+
+# Offset of every instance's table inside one phase block
+INSTANCE_OFFSETS = [SHAPE_OFFSETS[shape_number] for shape_number, squares in INSTANCES]
+
+
+class PatternTable:
+
+    def __init__(self, values, phases=1):
+        ''' Wraps a flat sequence of pattern values. Every phase block holds
+            one table of 3^n entries per pattern shape, in PATTERN_SHAPES order. '''
+        if len(values) != PHASE_SIZE * phases:
+            raise ValueError('pattern table has {} values, expected {}'.format(len(values), PHASE_SIZE * phases))
+        self.values = values
+        self.phases = phases
+
+    @classmethod
+    def from_square_weights(cls, weights, phases=1):
+        ''' Builds a table that scores like the given 8x8 square weights, as a starting
+            point for tuning. Every square's weight is split over the patterns covering
+            it and rounded to 1/SCALE, so scores can differ from the square weights by
+            a couple of points. '''
+        coverage = [[len(SQUARE_REFS[row][col]) for col in range(SIZE)] for row in range(SIZE)]
+        block = array('h')
+        for name, squares in PATTERN_SHAPES:
+            table = [0]
+            for row, col in reversed(squares):
+                share = round(weights[row][col] * SCALE / coverage[row][col])
+                table = [rest + (0, share, -share)[digit] for rest in table for digit in range(3)]
+            block.extend(table)
+        return cls(block * phases, phases)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATTERN_FILE):
+        ''' Maps a table file written by save() into memory without copying it '''
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, phases = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('{} is not a pattern table file'.format(path))
+        values = memoryview(data)[HEADER.size:].cast('h')
+        if sys.byteorder != 'little':
+            values = array('h', values)
+            values.byteswap()
+        return cls(values, phases)
+
+    def save(self, path=DEFAULT_PATTERN_FILE):
+        ''' Writes the table as a header followed by little-endian int16 values '''
+        values = array('h', self.values)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, self.phases))
+            file.write(values.tobytes())
+
+    def indices(self, board) -> [int]:
+        ''' Returns the base-3 index of every pattern instance on the given board '''
+        if len(board) != SIZE or len(board[0]) != SIZE:
+            raise ValueError('pattern evaluation needs an 8x8 board')
+        result = []
+        for shape_number, squares in INSTANCES:
+            index = 0
+            for power, (row, col) in enumerate(squares):
+                index += DIGITS[board[row][col]] * 3 ** power
+            result.append(index)
+        return result
+
+    def update(self, indices, row, col, old, new) -> None:
+        ''' Updates the indices in place after the cell changed from old to new color '''
+        change = DIGITS[new] - DIGITS[old]
+        for instance_number, power in SQUARE_REFS[row][col]:
+            indices[instance_number] += change * power
+
+    def phase(self, discs) -> int:
+        ''' Returns the phase block used for a board with the given disc count '''
+        return min(self.phases - 1, max(0, discs - 4) * self.phases // 61)
+
+    def score(self, indices, turn, discs=4) -> int:
+        ''' Returns the pattern evaluation from the point of view of turn '''
+        base = self.phase(discs) * PHASE_SIZE
+        values = self.values
+        total = 0
+        for instance_number, index in enumerate(indices):
+            total += values[base + INSTANCE_OFFSETS[instance_number] + index]
+        if turn == othello.WHITE:
+            total = -total
+        return total // SCALE
+
+
+if __name__ == '__main__':
+    # Writes a table seeded from the default square weights
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATTERN_FILE
+    PatternTable.from_square_weights(othello.SQUARE_WEIGHTS).save(path)
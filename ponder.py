@@ -0,0 +1,81 @@
+import threading
+
+import bitboard
+import mcts
+import search
+
+MAX_DEPTH = 12  # deepest iteration a negamax ponder search starts
+
+
+class Ponderer:
+
+    def __init__(self, engine, max_depth=MAX_DEPTH):
+        ''' Searches on the opponent's time in a background thread with the engine of one
+            player, so its transposition table or tree is warm when the player has to move '''
+        self.engine = engine
+        self.max_depth = max_depth
+        self.thread = None
+        self.stopping = threading.Event()
+        self.position = None  # (own, opponent) that is searched, from the pondering player's side
+        self.result = None  # (depth, score, move bit) of the last finished iteration
+
+    def start(self, own: int, opponent: int) -> None:
+        ''' Starts pondering after the player played into the position where the opponent
+            is to move, given as own = the opponent's beads. Negamax engines search the
+            position after the reply their table predicts, MCTS grows the opponent's tree. '''
+        self.stop()
+        geometry = self.engine.geometry
+        if isinstance(self.engine, mcts.MCTS):
+            self.position = (own, opponent)
+            target = self.run_mcts
+        else:
+            replies = geometry.legal_moves(own, opponent)
+            if replies:
+                entry = self.engine.table.get((own, opponent))
+                reply = entry[3] if entry is not None and entry[3] & replies else replies & -replies
+                own, opponent = geometry.play(own, opponent, reply)
+            elif not geometry.legal_moves(opponent, own):
+                return
+            # after the reply, or the opponent's pass, it is the pondering player's move
+            self.position = (opponent, own)
+            target = self.run_negamax
+        self.result = None
+        self.stopping.clear()
+        self.engine.stop_event = self.stopping
+        self.thread = threading.Thread(target=target, daemon=True)
+        self.thread.start()
+
+    def run_negamax(self) -> None:
+        own, opponent = self.position
+        engine = self.engine
+        engine.previous_score = None
+        engine.deadline = None
+        empties = engine.geometry.size - bitboard.count(own | opponent)
+        for depth in range(1, min(self.max_depth, empties) + 1):
+            try:
+                score, move = engine.search(own, opponent, depth)
+            except search.SearchTimeout:
+                break
+            self.result = (depth, score, move)
+
+    def run_mcts(self) -> None:
+        own, opponent = self.position
+        self.engine.think(own, opponent, max_playouts=float('inf'))
+
+    def stop(self) -> None:
+        ''' Stops the ponder search and waits for it '''
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join()
+        self.engine.stop_event = None
+        self.thread = None
+
+    def finish(self, own: int, opponent: int):
+        ''' Stops pondering when the player has to move in the given position. Returns the
+            (depth, score, move bit) of the ponder search on a hit, None otherwise. '''
+        self.stop()
+        if self.position != (own, opponent) or isinstance(self.engine, mcts.MCTS):
+            # MCTS finds the position in its tree by itself
+            return None
+        return self.result
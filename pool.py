@@ -0,0 +1,55 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import search
+
+WORKERS = os.cpu_count() or 1
+
+
+class EnginePool:
+
+    def __init__(self, workers=WORKERS, table_size=search.TABLE_SIZE):
+        ''' Runs the searches of many games on a pool of workers. All the games played with
+            the same weights share one transposition table and one evaluation. '''
+        self.executor = ThreadPoolExecutor(workers)
+        self.table_size = table_size
+        self.shared = {}
+        self.lock = threading.Lock()
+
+    def shared_state(self, rows: int, cols: int, weights, probcut=None) -> tuple:
+        ''' Returns the (table, evaluation) shared by the given weights. Selective search
+            stores different scores, so every ProbCut gets tables of its own. '''
+        key = (rows, cols, tuple(tuple(row) for row in weights), id(probcut) if probcut is not None else None)
+        with self.lock:
+            if key not in self.shared:
+                self.shared[key] = (search.TranspositionTable(self.table_size),
+                                    search.Evaluation(rows, cols, weights))
+            return self.shared[key]
+
+    def engine(self, rows: int, cols: int, weights, mode=search.PVS, probcut=None) -> search.Search:
+        ''' Returns a new searcher that uses the shared table and evaluation of its weights '''
+        table, evaluation = self.shared_state(rows, cols, weights, probcut)
+        return search.Search(rows, cols, weights, mode, table, probcut, evaluation)
+
+    def submit(self, function, *args):
+        ''' Runs function(*args) on a worker and returns its Future '''
+        return self.executor.submit(function, *args)
+
+    def search(self, game, turn: str):
+        ''' Schedules the move search of a game, the Future gives the (row, col) '''
+        return self.submit(lambda: game.get_minimax_move_alpha(turn, time.time()))
+
+    def play(self, games) -> list:
+        ''' Plays ai_vs_ai for all the games at the same time and returns their results in order '''
+        futures = [self.submit(game.ai_vs_ai) for game in games]
+        return [future.result() for future in futures]
+
+    def table_sizes(self) -> [int]:
+        ''' Returns the number of entries in the table of every weight set '''
+        with self.lock:
+            return [len(table) for table, evaluation in self.shared.values()]
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,110 @@
+import struct
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import batch
+import othello
+
+# An 8x8 position in 17 bytes: black beads, white beads (bit row * 8 + col) and the side to move.
+# Positions travel between processes in this form instead of pickled OthelloGame objects.
+
+POSITION = struct.Struct('<QQB')
+DTYPE = np.dtype([('black', '<u8'), ('white', '<u8'), ('turn', 'u1')])  # packed, DTYPE.itemsize == 17
+TURNS = [othello.BLACK, othello.WHITE]
+
+
+def encode(black: int, white: int, turn: str) -> bytes:
+    return POSITION.pack(black, white, TURNS.index(turn))
+
+
+def decode(data, offset=0) -> tuple:
+    ''' Returns the (black, white, turn) of the position at offset of a buffer '''
+    black, white, turn = POSITION.unpack_from(data, offset)
+    return black, white, TURNS[turn]
+
+
+def from_game(game) -> tuple:
+    ''' Returns the (black, white, turn) of an 8x8 OthelloGame '''
+    black, white = game.bitboards(othello.BLACK)
+    return black, white, game.turn
+
+
+def to_game(black: int, white: int, turn: str, **options) -> othello.OthelloGame:
+    ''' Builds an OthelloGame of the position, options go to the OthelloGame constructor '''
+    own, opponent = (black, white) if turn == othello.BLACK else (white, black)
+    return othello.OthelloGame.from_bitboards(8, 8, turn, own, opponent, **options)
+
+
+def encode_batch(positions) -> np.ndarray:
+    ''' Returns a DTYPE array of (black, white, turn) tuples, its bytes are the packed positions '''
+    array = np.empty(len(positions), dtype=DTYPE)
+    if len(positions):
+        blacks, whites, turns = zip(*positions)
+        array['black'] = np.array(blacks, dtype=np.uint64)
+        array['white'] = np.array(whites, dtype=np.uint64)
+        array['turn'] = [turn == othello.WHITE for turn in turns]
+    return array
+
+
+def decode_batch(array) -> [tuple]:
+    ''' Returns the (black, white, turn) tuples of a DTYPE array or of packed bytes '''
+    if not isinstance(array, np.ndarray):
+        array = np.frombuffer(array, dtype=DTYPE)
+    return [(black, white, TURNS[turn]) for black, white, turn in
+            zip(array['black'].tolist(), array['white'].tolist(), array['turn'].tolist())]
+
+
+def to_batch(array) -> batch.Batch:
+    ''' Returns the batch.Batch of the positions of a DTYPE array '''
+    black_to_move = array['turn'] == 0
+    return batch.Batch(np.where(black_to_move, array['black'], array['white']),
+                       np.where(black_to_move, array['white'], array['black']), black_to_move)
+
+
+def from_batch(games: batch.Batch) -> np.ndarray:
+    ''' Returns the DTYPE array of the positions of a batch.Batch '''
+    array = np.empty(len(games), dtype=DTYPE)
+    array['black'], array['white'] = games.black_white()
+    array['turn'] = ~games.black_to_move
+    return array
+
+
+class SharedPositions:
+
+    def __init__(self, capacity: int, name=None):
+        ''' An array of capacity positions in shared memory. The coordinator creates it,
+            workers attach by name and read or write their slices in place without copying. '''
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=max(capacity, 1) * DTYPE.itemsize)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.capacity = capacity
+        self.array = np.ndarray((capacity,), dtype=DTYPE, buffer=self.memory.buf)
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def __len__(self):
+        return self.capacity
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+    def __setitem__(self, index, value):
+        self.array[index] = value
+
+    def close(self) -> None:
+        # the array and every slice taken from it are views of the memory, they have to go first
+        self.array = None
+        self.memory.close()
+
+    def unlink(self) -> None:
+        ''' Frees the memory, called once by the coordinator after every process closed it '''
+        self.memory.unlink()
+
+
+def chunks(count: int, size: int) -> [tuple]:
+    ''' Returns the (start, stop) slices a work queue hands out for count positions '''
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
@@ -0,0 +1,144 @@
+import argparse
+import json
+import random
+import time
+
+import bitboard
+import othello
+import search
+
+DEFAULT_PROBCUT_FILE = 'probcut.json'
+
+THRESHOLD = 1.5  # cut when the deep score is predicted this many sigmas outside the window
+PHASES = 4  # game phases, by number of empty squares
+DEPTH_PAIRS = [(3, 1), (4, 2), (5, 2), (6, 3), (7, 3), (8, 4)]  # (deep, shallow) depths
+MIN_SAMPLES = 10  # fewer positions than this give no parameters
+
+
+class ProbCut:
+
+    def __init__(self, parameters, threshold=THRESHOLD, phases=PHASES, size=64):
+        ''' parameters maps (deep depth, phase) to (shallow depth, slope, intercept, sigma),
+            where deep score ~ slope * shallow score + intercept with residual deviation sigma '''
+        self.parameters = parameters
+        self.threshold = threshold
+        self.phases = phases
+        self.size = size
+
+    def phase(self, empties: int) -> int:
+        ''' Returns the phase of a position with the given number of empty squares '''
+        return min(self.phases - 1, (self.size - empties) * self.phases // (self.size + 1))
+
+    def lookup(self, depth: int, empties: int):
+        ''' Returns (shallow depth, slope, intercept, sigma) or None when there is no fit '''
+        return self.parameters.get((depth, self.phase(empties)))
+
+    @classmethod
+    def load(cls, path=DEFAULT_PROBCUT_FILE):
+        with open(path) as file:
+            data = json.load(file)
+        parameters = {}
+        for pair in data['pairs']:
+            parameters[pair['deep'], pair['phase']] = (pair['shallow'], pair['slope'], pair['intercept'], pair['sigma'])
+        return cls(parameters, data['threshold'], data['phases'], data['size'])
+
+    def save(self, path=DEFAULT_PROBCUT_FILE):
+        pairs = []
+        for (deep, phase), (shallow, slope, intercept, sigma) in sorted(self.parameters.items()):
+            pairs.append({'deep': deep, 'shallow': shallow, 'phase': phase,
+                          'slope': slope, 'intercept': intercept, 'sigma': sigma})
+        with open(path, 'w') as file:
+            json.dump({'threshold': self.threshold, 'phases': self.phases, 'size': self.size, 'pairs': pairs},
+                      file, indent=1)
+
+
+def linear_fit(samples) -> tuple:
+    ''' Least squares fit of deep = slope * shallow + intercept, returns (slope, intercept, sigma) '''
+    n = len(samples)
+    mean_x = sum(x for x, y in samples) / n
+    mean_y = sum(y for x, y in samples) / n
+    variance = sum((x - mean_x) ** 2 for x, y in samples)
+    if variance == 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in samples) / variance
+    intercept = mean_y - slope * mean_x
+    sigma = (sum((y - slope * x - intercept) ** 2 for x, y in samples) / n) ** 0.5
+    return slope, intercept, sigma
+
+
+def self_play_positions(number: int, rows=8, cols=8, seed=0) -> [tuple]:
+    ''' Returns (own, opponent) bitboards taken from games of mostly random play
+        with the occasional one-ply greedy move, spread over all the phases '''
+    generator = random.Random(seed)
+    geometry = bitboard.geometry(rows, cols)
+    engine = search.Search(rows, cols, othello.generate_weights(rows, cols), search.PVS)
+    positions = []
+
+    def choose(own, opponent, turn, moves):
+        if generator.random() < 0.1:
+            positions.append((own, opponent))
+        moves = list(bitboard.bits(moves))
+        if generator.random() < 0.3:
+            return max(moves, key=lambda bit: engine.evaluate(*geometry.play(own, opponent, bit)))
+        return generator.choice(moves)
+
+    while len(positions) < number:
+        othello.play_from_start(choose, rows, cols)
+    return positions[:number]
+
+
+def calibrate(weights, positions, depth_pairs=DEPTH_PAIRS, rows=8, cols=8, threshold=THRESHOLD, phases=PHASES,
+              verbose=False) -> ProbCut:
+    ''' Fits the shallow to deep score relation of every depth pair and phase '''
+    probcut = ProbCut({}, threshold, phases, rows * cols)
+    samples = {}
+    for number, (own, opponent) in enumerate(positions):
+        empties = rows * cols - bitboard.count(own | opponent)
+        engine = search.Search(rows, cols, weights, search.PVS)
+        for deep, shallow in depth_pairs:
+            if deep > empties:
+                continue
+            # the table would hand deeper scores to the shallow search, so every search starts empty
+            engine.table.clear()
+            shallow_score = engine.negamax(own, opponent, shallow, search.MIN_VALUE, search.MAX_VALUE)
+            engine.table.clear()
+            deep_score = engine.negamax(own, opponent, deep, search.MIN_VALUE, search.MAX_VALUE)
+            samples.setdefault((deep, shallow, probcut.phase(empties)), []).append((shallow_score, deep_score))
+        if verbose:
+            print('position {} of {}'.format(number + 1, len(positions)))
+    for (deep, shallow, phase), pairs in samples.items():
+        # finished games scores are not predictable by the evaluation
+        pairs = [(x, y) for x, y in pairs if abs(x) < search.DISC_SCORE and abs(y) < search.DISC_SCORE]
+        if len(pairs) < MIN_SAMPLES:
+            continue
+        fit = linear_fit(pairs)
+        if fit is not None and fit[0] > 0:
+            probcut.parameters[deep, phase] = (shallow,) + fit
+    return probcut
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fits the ProbCut parameters for an evaluation')
+    parser.add_argument('command', choices=['calibrate'])
+    parser.add_argument('--positions', type=int, default=200)
+    parser.add_argument('--max-depth', type=int, default=6, help='deepest depth pair to fit')
+    parser.add_argument('--weights', help='JSON file with an 8x8 weight table, default SQUARE_WEIGHTS')
+    parser.add_argument('--out', default=DEFAULT_PROBCUT_FILE)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    weights = othello.SQUARE_WEIGHTS
+    if args.weights:
+        with open(args.weights) as file:
+            weights = json.load(file)
+    start_time = time.time()
+    positions = self_play_positions(args.positions, seed=args.seed)
+    pairs = [(deep, shallow) for deep, shallow in DEPTH_PAIRS if deep <= args.max_depth]
+    probcut = calibrate(weights, positions, pairs, verbose=True)
+    probcut.save(args.out)
+    print('{} parameter sets written to {} in {:.1f} seconds'.format(len(probcut.parameters), args.out,
+                                                                    time.time() - start_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,381 @@
+import time
+from functools import lru_cache
+
+import bitboard
+
+MIN_VALUE = -100000
+MAX_VALUE = 100000
+
+# Scores of finished games: disc difference times this, so a win is worth more than any evaluation
+DISC_SCORE = 1000
+
+# Search modes, ALPHA_BETA is the original minimax of OthelloGame
+ALPHA_BETA = 'alphabeta'
+NEGAMAX = 'negamax'
+PVS = 'pvs'
+ASPIRATION = 'aspiration'
+MTDF = 'mtdf'
+MODES = [ALPHA_BETA, NEGAMAX, PVS, ASPIRATION, MTDF]
+MCTS = 'mcts'  # Monte Carlo tree search of mcts.MCTS, not a negamax mode
+ENGINE_MODES = MODES + [MCTS]
+
+ASPIRATION_WINDOW = 25  # half width of the first aspiration window
+TABLE_SIZE = 1000000  # entries kept in a transposition table before it is cleared
+CHECK_EVERY = 1023  # the clock is looked at once every CHECK_EVERY + 1 nodes
+
+# Transposition table bound flags
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class SearchTimeout(Exception):
+    ''' Raised inside the search when its deadline passed '''
+    pass
+
+
+class TranspositionTable:
+
+    def __init__(self, max_size=TABLE_SIZE):
+        ''' Maps (own, opponent) bitboards to (depth, score, flag, move) '''
+        self.entries = {}
+        self.max_size = max_size
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def store(self, key, depth, score, flag, move):
+        if len(self.entries) >= self.max_size:
+            self.entries.clear()
+        self.entries[key] = (depth, score, flag, move)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SearchResult:
+
+    def __init__(self, move, score, depth, nodes, elapsed, pv=None):
+        ''' The outcome of a search, move is a (row, col) or None and pv the
+            (row, col) moves of the principal variation starting with move '''
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.time = elapsed
+        self.pv = pv
+
+    def nodes_per_second(self) -> float:
+        return self.nodes / max(self.time, 1e-9)
+
+
+class Evaluation:
+
+    def __init__(self, rows: int, cols: int, weights):
+        ''' The lookup tables of a square weight evaluation, built once and shared
+            by every searcher that uses the same weights '''
+        geometry = bitboard.geometry(rows, cols)
+        self.weight_of = {}
+        for row in range(rows):
+            for col in range(cols):
+                self.weight_of[geometry.bit(row, col)] = weights[row][col]
+        # the weight sum of every byte of a bitboard, for a fast evaluation
+        self.byte_tables = []
+        for start in range(0, rows * cols, 8):
+            squares = [weights[square // cols][square % cols] for square in range(start, min(start + 8, rows * cols))]
+            table = []
+            for byte in range(256):
+                table.append(sum(weight for i, weight in enumerate(squares) if byte >> i & 1))
+            self.byte_tables.append(table)
+
+
+@lru_cache(maxsize=64)
+def cached_evaluation(rows: int, cols: int, weights: tuple) -> Evaluation:
+    ''' Returns the Evaluation of a weight table given as a tuple of row tuples, built on first use '''
+    return Evaluation(rows, cols, weights)
+
+
+class Search:
+
+    def __init__(self, rows: int, cols: int, weights, mode=PVS, table=None, probcut=None, evaluation=None):
+        ''' A negamax searcher over bitboards that evaluates with the given square weights.
+            probcut is an optional probcut.ProbCut that enables selective search,
+            table and evaluation can be shared with other searchers of the same weights. '''
+        if mode not in MODES or mode == ALPHA_BETA:
+            raise ValueError('unknown search mode: {}'.format(mode))
+        self.geometry = bitboard.geometry(rows, cols)
+        self.mode = mode
+        self.table = table if table is not None else TranspositionTable()
+        if evaluation is None:
+            evaluation = cached_evaluation(rows, cols, tuple(tuple(row) for row in weights))
+        self.weight_of = evaluation.weight_of
+        self.byte_tables = evaluation.byte_tables
+        self.probcut = probcut
+        self.probing = False
+        self.root = None
+        self.nodes = 0
+        self.stopped = False
+        self.stop_event = None  # optional threading or multiprocessing Event that also stops the search
+        self.deadline = None
+        self.previous_score = None
+
+    def evaluate(self, own: int, opponent: int) -> int:
+        ''' Returns the weighted square score from the point of view of own '''
+        score = 0
+        for table in self.byte_tables:
+            score += table[own & 255] - table[opponent & 255]
+            own >>= 8
+            opponent >>= 8
+        return score
+
+    def final_score(self, own: int, opponent: int) -> int:
+        ''' Returns the score of a finished game from the point of view of own '''
+        return (bitboard.count(own) - bitboard.count(opponent)) * DISC_SCORE
+
+    def ordered_moves(self, moves: int, first=0) -> [int]:
+        ''' Returns the move bits, the given first move and then the highest weights first '''
+        ordered = sorted(bitboard.bits(moves), key=self.weight_of.__getitem__, reverse=True)
+        if first and moves & first:
+            ordered.remove(first)
+            ordered.insert(0, first)
+        return ordered
+
+    def stop(self) -> None:
+        ''' Asks a running search, possibly in another thread, to finish as soon as it can.
+            A search that has not started yet finishes at once, until resume() is called. '''
+        self.stopped = True
+
+    def resume(self) -> None:
+        ''' Clears a stop. Call it before handing a search to another thread, clearing it
+            in there would lose a stop that arrives before the search starts. '''
+        self.stopped = False
+
+    def check_time(self) -> None:
+        if self.stopped or (self.deadline is not None and time.time() > self.deadline):
+            raise SearchTimeout()
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchTimeout()
+
+    def negamax(self, own: int, opponent: int, depth: int, alpha: int, beta: int, passed=False) -> int:
+        ''' Fail-soft alpha-beta in negamax form. In PVS mode every move after the
+            first is searched with a null window and only re-searched if it fails high. '''
+        self.nodes += 1
+        if not self.nodes & CHECK_EVERY:
+            self.check_time()
+        if depth <= 0:
+            return self.evaluate(own, opponent)
+
+        key = (own, opponent)
+        entry = self.table.get(key)
+        table_move = 0
+        if entry is not None:
+            entry_depth, entry_score, flag, table_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER and entry_score >= beta:
+                    return entry_score
+                if flag == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        if self.probcut is not None and not self.probing and key != self.root:
+            cut = self.probcut_cut(own, opponent, depth, alpha, beta)
+            if cut is not None:
+                return cut
+
+        moves = self.geometry.legal_moves(own, opponent)
+        if not moves:
+            if passed:
+                return self.final_score(own, opponent)
+            return -self.negamax(opponent, own, depth, -beta, -alpha, True)
+
+        original_alpha = alpha
+        null_window = self.mode != NEGAMAX
+        best_score = MIN_VALUE - 1
+        best_move = 0
+        for move in self.ordered_moves(moves, table_move):
+            new_own, new_opponent = self.geometry.play(own, opponent, move)
+            if best_move and null_window:
+                score = -self.negamax(new_opponent, new_own, depth - 1, -alpha - 1, -alpha)
+                if alpha < score < beta:
+                    score = -self.negamax(new_opponent, new_own, depth - 1, -beta, -score)
+            else:
+                score = -self.negamax(new_opponent, new_own, depth - 1, -beta, -alpha)
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table.store(key, depth, best_score, flag, best_move)
+        return best_score
+
+    def probcut_cut(self, own: int, opponent: int, depth: int, alpha: int, beta: int):
+        ''' Returns beta or alpha when a shallow search predicts that the deep score falls
+            outside the window with high confidence, None when the node must be searched '''
+        empties = self.geometry.size - bitboard.count(own | opponent)
+        parameters = self.probcut.lookup(depth, empties)
+        if parameters is None:
+            return None
+        shallow, slope, intercept, sigma = parameters
+        margin = self.probcut.threshold * sigma
+        self.probing = True
+        try:
+            bound = round((beta + margin - intercept) / slope)
+            if bound < MAX_VALUE and self.negamax(own, opponent, shallow, bound - 1, bound) >= bound:
+                return beta
+            bound = round((alpha - margin - intercept) / slope)
+            if bound > MIN_VALUE and self.negamax(own, opponent, shallow, bound, bound + 1) <= bound:
+                return alpha
+        finally:
+            self.probing = False
+        return None
+
+    def aspiration(self, own: int, opponent: int, depth: int) -> int:
+        ''' Searches a window around the previous iteration's score and widens it on failure '''
+        if self.previous_score is None:
+            return self.negamax(own, opponent, depth, MIN_VALUE, MAX_VALUE)
+        window = ASPIRATION_WINDOW
+        alpha = max(self.previous_score - window, MIN_VALUE)
+        beta = min(self.previous_score + window, MAX_VALUE)
+        while True:
+            score = self.negamax(own, opponent, depth, alpha, beta)
+            if alpha < score < beta or (alpha == MIN_VALUE and beta == MAX_VALUE):
+                return score
+            window *= 4
+            if score <= alpha:
+                alpha = max(score - window, MIN_VALUE)
+            else:
+                beta = min(score + window, MAX_VALUE)
+
+    def mtdf(self, own: int, opponent: int, depth: int) -> int:
+        ''' Converges on the minimax score with null-window searches only '''
+        guess = self.previous_score if self.previous_score is not None else self.evaluate(own, opponent)
+        lower = MIN_VALUE
+        upper = MAX_VALUE
+        while lower < upper:
+            beta = guess + 1 if guess == lower else guess
+            guess = self.negamax(own, opponent, depth, beta - 1, beta)
+            if guess < beta:
+                upper = guess
+            else:
+                lower = guess
+        return guess
+
+    def search(self, own: int, opponent: int, depth: int) -> tuple:
+        ''' Runs one iteration with the selected mode and returns (score, move bit) '''
+        self.root = (own, opponent)
+        if self.mode == ASPIRATION:
+            score = self.aspiration(own, opponent, depth)
+        elif self.mode == MTDF:
+            score = self.mtdf(own, opponent, depth)
+        else:
+            score = self.negamax(own, opponent, depth, MIN_VALUE, MAX_VALUE)
+        self.previous_score = score
+        entry = self.table.get((own, opponent))
+        move = entry[3] if entry is not None else 0
+        if not move:
+            moves = self.geometry.legal_moves(own, opponent)
+            move = moves & -moves
+        return score, move
+
+    def think(self, own: int, opponent: int, max_depth: int, time_limit=None, start_time=None) -> SearchResult:
+        ''' Iterative deepening up to max_depth, the last finished iteration gives the move '''
+        if start_time is None:
+            start_time = time.time()
+        self.nodes = 0
+        self.previous_score = None
+        self.deadline = start_time + time_limit if time_limit is not None else None
+        score = 0
+        move = 0
+        finished = 0
+        empties = self.geometry.size - bitboard.count(own | opponent)
+        for depth in range(1, min(max_depth, empties) + 1):
+            try:
+                score, move = self.search(own, opponent, depth)
+            except SearchTimeout:
+                break
+            finished = depth
+        self.deadline = None
+        if not move:
+            moves = self.geometry.legal_moves(own, opponent)
+            move = moves & -moves
+        cell = self.geometry.cell(move) if move else None
+        return SearchResult(cell, score, finished, self.nodes, time.time() - start_time)
+
+    def principal_variation(self, own: int, opponent: int, move: int, length: int) -> [tuple]:
+        ''' Follows the best moves stored in the table after the given move '''
+        pv = [self.geometry.cell(move)]
+        own, opponent = self.geometry.play(own, opponent, move)
+        own, opponent = opponent, own
+        while len(pv) < length:
+            if not self.geometry.legal_moves(own, opponent):
+                if not self.geometry.legal_moves(opponent, own):
+                    break
+                own, opponent = opponent, own
+            entry = self.table.get((own, opponent))
+            if entry is None or not entry[3] & self.geometry.legal_moves(own, opponent):
+                break
+            pv.append(self.geometry.cell(entry[3]))
+            own, opponent = self.geometry.play(own, opponent, entry[3])
+            own, opponent = opponent, own
+        return pv
+
+    def root_pass(self, own: int, opponent: int, depth: int, moves: [int]) -> tuple:
+        ''' Searches the given root moves and returns (exact score, move) of the best one,
+            the other moves are only proven to be worse '''
+        alpha = MIN_VALUE - 1
+        best_move = 0
+        for move in moves:
+            new_own, new_opponent = self.geometry.play(own, opponent, move)
+            if best_move:
+                score = -self.negamax(new_opponent, new_own, depth - 1, -alpha - 1, -alpha)
+                if score > alpha:
+                    score = -self.negamax(new_opponent, new_own, depth - 1, -MAX_VALUE, -score)
+            else:
+                score = -self.negamax(new_opponent, new_own, depth - 1, -MAX_VALUE, MAX_VALUE)
+            if score > alpha:
+                alpha = score
+                best_move = move
+        return alpha, best_move
+
+    def multi_pv(self, own: int, opponent: int, count: int, max_depth: int, time_limit=None,
+                 start_time=None) -> [SearchResult]:
+        ''' Returns the best count root moves with exact scores and principal variations,
+            best first. Every pass excludes the moves found before it and gets its
+            subtrees from the table that the earlier passes filled. '''
+        if start_time is None:
+            start_time = time.time()
+        self.nodes = 0
+        self.deadline = start_time + time_limit if time_limit is not None else None
+        self.root = (own, opponent)
+        order = self.ordered_moves(self.geometry.legal_moves(own, opponent))
+        results = []
+        empties = self.geometry.size - bitboard.count(own | opponent)
+        for depth in range(1, min(max_depth, empties) + 1):
+            found = []
+            remaining = list(order)
+            try:
+                while remaining and len(found) < count:
+                    score, move = self.root_pass(own, opponent, depth, remaining)
+                    remaining.remove(move)
+                    found.append((score, move))
+            except SearchTimeout:
+                break
+            order = [move for score, move in found] + remaining
+            elapsed = time.time() - start_time
+            results = [SearchResult(self.geometry.cell(move), score, depth, self.nodes, elapsed,
+                                    self.principal_variation(own, opponent, move, depth)) for score, move in found]
+        self.deadline = None
+        return results
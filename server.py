@@ -0,0 +1,257 @@
+import argparse
+import os
+import socketserver
+import threading
+
+import bitboard
+import othello
+import pool
+import search
+
+HOST = '127.0.0.1'
+PORT = 9876
+WORKERS = pool.WORKERS
+MAX_DEPTH = 60  # depth limit of a 'go' that only gives a time
+
+# Protocol, one command per line, answers start with the command they belong to:
+#   newgame [rows cols]           -> ok
+#   position <cells> <B|W>        -> ok          cells are rows * cols of B, W or - in row order
+#   move <row> <col>              -> ok
+#   mode <search mode>            -> ok
+#   go [depth <n>] [time <secs>]  -> bestmove <row> <col> score <s> depth <d> nodes <n>  (or bestmove pass)
+#   stop                          -> ok, the running go answers with the best move found so far,
+#                                    a go still waiting for a worker with any legal move
+#   stats                         -> stats searches <n> nodes <n> time <secs> nps <n> table <entries>
+#   board                         -> board <cells> <B|W>
+#   quit
+# Errors are answered with 'error <message>', also a go whose search failed.
+
+
+class ProtocolError(Exception):
+    ''' Raised whenever a client sends a command that cannot be executed '''
+    pass
+
+
+class Session:
+
+    def __init__(self, pool, send):
+        ''' The state of one client: its position, engine and statistics '''
+        self.pool = pool
+        self.send = send
+        self.mode = search.PVS
+        self.future = None
+        self.searches = 0
+        self.nodes = 0
+        self.time = 0.0
+        self.new_game(8, 8)
+
+    def new_game(self, rows: int, cols: int) -> None:
+        self.rows = rows
+        self.cols = cols
+        self.geometry = bitboard.geometry(rows, cols)
+        game = othello.OthelloGame(rows, cols, othello.BLACK)
+        self.turn = othello.BLACK
+        self.own, self.opponent = game.bitboards(othello.BLACK)
+        self.engine = self.pool.engine(rows, cols, game.black_weights, self.mode)
+
+    def require_idle(self) -> None:
+        if self.future is not None and not self.future.done():
+            raise ProtocolError('search in progress')
+
+    def execute(self, line: str) -> bool:
+        ''' Runs one command line, returns False when the session should end '''
+        words = line.split()
+        if not words:
+            return True
+        command, arguments = words[0].lower(), words[1:]
+        if command == 'quit':
+            self.stop()
+            return False
+        handler = getattr(self, 'command_' + command, None)
+        if handler is None:
+            raise ProtocolError('unknown command ' + command)
+        handler(arguments)
+        return True
+
+    def command_newgame(self, arguments) -> None:
+        self.require_idle()
+        rows, cols = (int(arguments[0]), int(arguments[1])) if arguments else (8, 8)
+        if rows < 4 or cols < 4 or rows % 2 or cols % 2:
+            raise ProtocolError('board size must be even and at least 4')
+        self.new_game(rows, cols)
+        self.send('ok')
+
+    def command_position(self, arguments) -> None:
+        self.require_idle()
+        if (len(arguments) != 2 or len(arguments[0]) != self.rows * self.cols or
+                arguments[1] not in (othello.BLACK, othello.WHITE)):
+            raise ProtocolError('usage: position <cells> <B|W>')
+        cells = arguments[0]
+        board = [list(cells[row * self.cols:(row + 1) * self.cols]) for row in range(self.rows)]
+        if any(cell not in (othello.BLACK, othello.WHITE, othello.NONE) for cell in cells):
+            raise ProtocolError('cells must be B, W or -')
+        self.turn = arguments[1]
+        self.own, self.opponent = self.geometry.from_board(board, self.turn, othello.opposite_turn(self.turn))
+        self.send('ok')
+
+    def command_move(self, arguments) -> None:
+        self.require_idle()
+        row, col = int(arguments[0]), int(arguments[1])
+        if not (0 <= row < self.rows and 0 <= col < self.cols):
+            raise ProtocolError('move outside the board')
+        move = self.geometry.bit(row, col)
+        if not self.geometry.legal_moves(self.own, self.opponent) & move:
+            raise ProtocolError('illegal move')
+        own, opponent = self.geometry.play(self.own, self.opponent, move)
+        if self.geometry.legal_moves(opponent, own):
+            self.turn = othello.opposite_turn(self.turn)
+            own, opponent = opponent, own
+        self.own, self.opponent = own, opponent
+        self.send('ok')
+
+    def command_mode(self, arguments) -> None:
+        self.require_idle()
+        if not arguments or arguments[0] not in search.MODES or arguments[0] == search.ALPHA_BETA:
+            raise ProtocolError('mode must be one of ' + ', '.join(search.MODES[1:]))
+        self.mode = arguments[0]
+        self.engine.mode = self.mode
+        self.send('ok')
+
+    def command_go(self, arguments) -> None:
+        self.require_idle()
+        depth = None
+        time_limit = None
+        for name, value in zip(arguments[::2], arguments[1::2]):
+            if name == 'depth':
+                depth = int(value)
+            elif name == 'time':
+                time_limit = float(value)
+            else:
+                raise ProtocolError('unknown go limit ' + name)
+        if depth is None:
+            depth = othello.SEARCH_DEPTH if time_limit is None else MAX_DEPTH
+        # a stop that comes after this, even before the worker starts the search, stops it
+        self.engine.resume()
+        self.future = self.pool.submit(self.search, self.own, self.opponent, depth, time_limit)
+        self.future.add_done_callback(self.search_done)
+
+    def search(self, own: int, opponent: int, depth: int, time_limit) -> None:
+        ''' Runs on a pool worker and answers the go command '''
+        if not self.geometry.legal_moves(own, opponent):
+            self.send('bestmove pass')
+            return
+        result = self.engine.think(own, opponent, depth, time_limit)
+        self.searches += 1
+        self.nodes += result.nodes
+        self.time += result.time
+        row, col = result.move
+        self.send('bestmove {} {} score {} depth {} nodes {}'.format(row, col, result.score, result.depth,
+                                                                     result.nodes))
+
+    def search_done(self, future) -> None:
+        ''' Reports a search that failed on its worker, the go would get no answer otherwise '''
+        if not future.cancelled() and future.exception() is not None:
+            self.send('error search failed: {!r}'.format(future.exception()))
+
+    def command_stop(self, arguments) -> None:
+        self.stop()
+        self.send('ok')
+
+    def stop(self) -> None:
+        ''' Stops the running search. A go still waiting for a worker is dropped and
+            answered at once with a legal move, the search had no best move yet. '''
+        if self.future is None or self.future.done():
+            return
+        if self.future.cancel():
+            moves = self.geometry.legal_moves(self.own, self.opponent)
+            if moves:
+                row, col = self.geometry.cell(moves & -moves)
+                self.send('bestmove {} {} score 0 depth 0 nodes 0'.format(row, col))
+            else:
+                self.send('bestmove pass')
+        else:
+            self.engine.stop()
+
+    def command_stats(self, arguments) -> None:
+        self.send('stats searches {} nodes {} time {:.3f} nps {:.0f} table {}'.format(
+            self.searches, self.nodes, self.time, self.nodes / max(self.time, 1e-9), len(self.engine.table)))
+
+    def command_board(self, arguments) -> None:
+        board = self.geometry.to_board(self.own, self.opponent, self.turn, othello.opposite_turn(self.turn),
+                                       othello.NONE)
+        self.send('board {} {}'.format(''.join(map(''.join, board)), self.turn))
+
+
+class SessionHandler(socketserver.StreamRequestHandler):
+
+    def handle(self) -> None:
+        ''' Reads the commands of one client until it quits or disconnects '''
+        lock = threading.Lock()
+
+        def send(line):
+            with lock:
+                try:
+                    self.wfile.write((line + '\n').encode())
+                    self.wfile.flush()
+                except OSError:
+                    pass
+
+        session = Session(self.server.pool, send)
+        try:
+            for raw_line in self.rfile:
+                try:
+                    if not session.execute(raw_line.decode(errors='replace')):
+                        break
+                except (ProtocolError, ValueError, IndexError) as error:
+                    send('error {}'.format(error))
+        finally:
+            session.stop()
+
+
+class PoolServerMixin:
+    ''' Gives every server one engine pool shared by all its sessions '''
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, workers=WORKERS):
+        super().__init__(address, SessionHandler)
+        self.pool = pool.EnginePool(workers)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class EngineServer(PoolServerMixin, socketserver.ThreadingMixIn, socketserver.TCPServer):
+    pass
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class UnixEngineServer(PoolServerMixin, socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Othello engine server speaking a line protocol')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.remove(args.unix)
+        server = UnixEngineServer(args.unix, args.workers)
+    else:
+        server = EngineServer((args.host, args.port), args.workers)
+    with server:
+        print('engine server listening on {}'.format(args.unix or '{}:{}'.format(args.host, args.port)))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == '__main__':
+    main()
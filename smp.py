@@ -0,0 +1,183 @@
+import multiprocessing
+import os
+import struct
+from multiprocessing import shared_memory
+
+import search
+
+HELPERS = max((os.cpu_count() or 1) - 1, 1)
+TABLE_ENTRIES = 1 << 20  # entries of the shared table, 16 bytes each
+
+MASK = (1 << 64) - 1
+ENTRY = struct.Struct('<QQ')  # key ^ data, data
+SCORE_OFFSET = 1 << 31
+
+
+def mix(value: int) -> int:
+    ''' Scrambles an int of any size into 64 bits (splitmix64 finalizer on every 64-bit word) '''
+    result = 0
+    while True:
+        word = (value & MASK) ^ result
+        word = ((word ^ (word >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+        word = ((word ^ (word >> 27)) * 0x94D049BB133111EB) & MASK
+        result = word ^ (word >> 31)
+        value >>= 64
+        if not value:
+            return result
+
+
+def weights_key(weights) -> int:
+    ''' A 64-bit key of a weight table, so searches with other weights never share entries '''
+    return mix(hash(tuple(tuple(row) for row in weights)) & MASK)
+
+
+class SharedTable:
+
+    def __init__(self, entries=TABLE_ENTRIES, name=None, salt=0):
+        ''' A transposition table in shared memory without locks. Every entry is stored as
+            (key ^ data, data) so an entry torn by concurrent writers fails verification. '''
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=entries * ENTRY.size)
+            self.memory.buf[:] = bytes(entries * ENTRY.size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.entries = entries
+        self.salt = salt
+
+    def hash(self, key) -> int:
+        own, opponent = key
+        return mix(own) ^ mix(mix(opponent) ^ 0x9E3779B97F4A7C15) ^ self.salt
+
+    def get(self, key):
+        ''' Returns (depth, score, flag, move bit) or None '''
+        hashed = self.hash(key)
+        check, data = ENTRY.unpack_from(self.memory.buf, (hashed % self.entries) * ENTRY.size)
+        if check ^ data != hashed or not data:
+            return None
+        move_index = data >> 42 & 0x1FF
+        return (data >> 32 & 0xFF, (data & 0xFFFFFFFF) - SCORE_OFFSET, data >> 40 & 0x3,
+                1 << (move_index - 1) if move_index else 0)
+
+    def store(self, key, depth, score, flag, move):
+        hashed = self.hash(key)
+        # evolved weights are floats, the entry keeps the score rounded
+        data = (int(round(score)) + SCORE_OFFSET) | min(depth, 255) << 32 | flag << 40 | move.bit_length() << 42
+        ENTRY.pack_into(self.memory.buf, (hashed % self.entries) * ENTRY.size, hashed ^ data, data)
+
+    def clear(self):
+        self.memory.buf[:] = bytes(self.entries * ENTRY.size)
+
+    def __len__(self):
+        ''' Returns the number of occupied entries, a free entry is all zero '''
+        with self.memory.buf.cast('Q') as words:
+            return self.entries - words[1::2].tolist().count(0)
+
+    def close(self):
+        self.memory.close()
+
+
+def helper(number, table_name, entries, tasks, done, stop_event):
+    ''' Helper process: searches every root it gets with depths staggered by its number '''
+    table = SharedTable(entries, table_name)
+    engines = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            rows, cols, weights, mode, own, opponent, max_depth = task
+            engine = None
+            try:
+                key = (rows, cols, tuple(tuple(row) for row in weights), mode)
+                if key not in engines:
+                    engines[key] = search.Search(rows, cols, weights, mode, table)
+                engine = engines[key]
+                table.salt = weights_key(weights)
+                engine.stop_event = stop_event
+                engine.nodes = 0
+                engine.previous_score = None
+                for depth in range(1 + number % 2, max_depth + 1 + number % 2):
+                    engine.search(own, opponent, depth)
+            except search.SearchTimeout:
+                pass
+            finally:
+                # think waits for an answer of every helper, also of one whose search failed
+                done.put(engine.nodes if engine is not None else 0)
+    finally:
+        table.close()
+
+
+class LazySMP:
+
+    def __init__(self, helpers=HELPERS, entries=TABLE_ENTRIES):
+        ''' Starts helper processes that share one transposition table with the main process '''
+        self.table = SharedTable(entries)
+        self.tasks = multiprocessing.Queue()
+        self.done = multiprocessing.Queue()
+        self.stop_event = multiprocessing.Event()
+        self.helpers = []
+        for number in range(helpers):
+            process = multiprocessing.Process(target=helper, daemon=True,
+                                              args=(number, self.table.memory.name, entries, self.tasks, self.done,
+                                                    self.stop_event))
+            process.start()
+            self.helpers.append(process)
+        self.engines = {}
+        self.last_helper_nodes = 0
+
+    def engine(self, rows: int, cols: int, weights, mode) -> search.Search:
+        ''' Returns the searcher of this process for the weights, on the shared table '''
+        key = (rows, cols, tuple(tuple(row) for row in weights), mode)
+        if key not in self.engines:
+            self.engines[key] = search.Search(rows, cols, weights, mode, self.table)
+        self.table.salt = weights_key(weights)
+        return self.engines[key]
+
+    def start_helpers(self, task) -> list:
+        ''' Hands the task to every helper, returns the helpers that got it '''
+        self.stop_event.clear()
+        # a helper that died on an error takes no more tasks
+        helpers = [process for process in self.helpers if process.is_alive()]
+        for process in helpers:
+            self.tasks.put(task)
+        return helpers
+
+    def stop_helpers(self, helpers) -> None:
+        ''' Stops the helpers and waits for the answer of each '''
+        self.stop_event.set()
+        self.last_helper_nodes = sum(self.done.get() for process in helpers)
+
+    def think(self, rows: int, cols: int, weights, own: int, opponent: int, max_depth: int, time_limit=None,
+              start_time=None, mode=search.PVS) -> search.SearchResult:
+        ''' Searches the root in this process while the helpers search it too, and
+            returns the result of this process' search '''
+        engine = self.engine(rows, cols, weights, mode)
+        helpers = self.start_helpers((rows, cols, weights, mode, own, opponent, max_depth))
+        try:
+            result = engine.think(own, opponent, max_depth, time_limit, start_time)
+        finally:
+            self.stop_helpers(helpers)
+        return result
+
+    def search(self, rows: int, cols: int, weights, own: int, opponent: int, depth: int, deadline=None,
+               mode=search.PVS) -> tuple:
+        ''' One iteration of depth, for a timecontrol.TimeManager that does the deepening.
+            The helpers search until this process finishes or its deadline passes. Returns
+            (score, move bit), raises search.SearchTimeout after the deadline. '''
+        engine = self.engine(rows, cols, weights, mode)
+        helpers = self.start_helpers((rows, cols, weights, mode, own, opponent, depth))
+        engine.deadline = deadline
+        try:
+            return engine.search(own, opponent, depth)
+        finally:
+            engine.deadline = None
+            self.stop_helpers(helpers)
+
+    def close(self) -> None:
+        ''' Stops the helper processes and frees the shared table '''
+        for process in self.helpers:
+            self.tasks.put(None)
+        for process in self.helpers:
+            process.join()
+        self.table.close()
+        self.table.memory.unlink()
@@ -0,0 +1,44 @@
+import random
+
+import othello
+
+# The move generation of the original list-of-lists OthelloGame code, which the bitboard
+# and the batch move generation have to match exactly.
+
+
+def legal_moves(game, turn: str) -> set:
+    ''' Returns the (row, col) moves of turn found by the OthelloGame direction walk '''
+    moves = set()
+    for row in range(game.rows):
+        for col in range(game.cols):
+            if game.cell_color(row, col) == othello.NONE and any(
+                    game.is_valid_directional_move(row, col, row_dir, col_dir, turn)
+                    for row_dir, col_dir in game.adjacent_opposite_color_directions(row, col, turn)):
+                moves.add((row, col))
+    return moves
+
+
+def flipped(game, row: int, col: int) -> set:
+    ''' Returns the cells OthelloGame.move flips when the player to move plays (row, col) '''
+    after = game.copy_game(game.turn)
+    after.move(row, col, real=False)
+    return {(flip_row, flip_col) for flip_row in range(game.rows) for flip_col in range(game.cols)
+            if game.cell_color(flip_row, flip_col) not in (othello.NONE, after.cell_color(flip_row, flip_col))}
+
+
+def random_games(rows: int, cols: int, number: int, seed=0):
+    ''' Yields every position, an OthelloGame with a player to move, of number random games '''
+    generator = random.Random(seed)
+    for game_number in range(number):
+        game = othello.OthelloGame(rows, cols, othello.BLACK)
+        while True:
+            moves = legal_moves(game, game.turn)
+            if not moves:
+                game.turn = game.opposite_turn(game.turn)
+                moves = legal_moves(game, game.turn)
+                if not moves:
+                    break
+            yield game
+            row, col = generator.choice(sorted(moves))
+            game = game.copy_game(game.turn)
+            game.move(row, col, real=False)
@@ -0,0 +1,37 @@
+import io
+
+import analysis
+import othello
+import search
+
+
+class CountingExecutor:
+    ''' Runs the tasks in this process and remembers them per function '''
+
+    def __init__(self):
+        self.tasks = {}
+
+    def map(self, function, tasks, chunksize=1):
+        self.tasks.setdefault(function.__name__, []).extend(tasks)
+        return map(function, tasks)
+
+
+def test_duplicate_positions_are_searched_once(tmp_path):
+    games = tmp_path / 'games.txt'
+    games.write_text('f5d6c3\nf5 f5\nf5d6c4\nf5d6c3\n')
+    analysis.initialize_worker(othello.SQUARE_WEIGHTS, search.PVS, 2, None)
+    executor = CountingExecutor()
+    output = io.StringIO()
+    counters = analysis.analyze(str(games), output, executor)
+
+    # the start, after f5 and after f5d6 are the only positions, whatever was played there
+    searched = executor.tasks['analyze_position']
+    assert len(searched) == len(set(searched)) == 3
+    assert (counters['games'], counters['moves'], counters['searched'], counters['invalid']) == (3, 9, 3, 1)
+    # at most f5, d6, c3 and c4 are scored on their own, the repeated game adds nothing
+    scored = executor.tasks.get('score_move', [])
+    assert len(scored) == len(set(task[:3] for task in scored)) == counters['scored'] <= 4
+
+    lines = output.getvalue().splitlines()[1:]
+    assert [line.split('\t')[0] for line in lines] == (['1'] * 3 + ['# game 2: illegal move f5 at ply 2'] +
+                                                       ['3'] * 3 + ['4'] * 3)
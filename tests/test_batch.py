@@ -0,0 +1,29 @@
+import numpy as np
+
+import batch
+import bitboard
+import othello
+import reference
+
+
+def test_batch_matches_othello_game():
+    # Batch is 8x8 only, the other sizes are covered by the bitboard.Geometry comparison
+    games = list(reference.random_games(8, 8, 20))
+    geometry = bitboard.geometry(8, 8)
+    lanes = batch.Batch.from_games(games)
+    # every position has a legal move, so update() passed no lane
+    assert lanes.black_to_move.tolist() == [game.turn == othello.BLACK for game in games]
+    for game, moves in zip(games, lanes.moves.tolist()):
+        assert {geometry.cell(move) for move in bitboard.bits(moves)} == reference.legal_moves(game, game.turn)
+
+    plays = [sorted(reference.legal_moves(game, game.turn))[-1] for game in games]
+    move_bits = np.array([geometry.bit(*play) for play in plays], dtype=np.uint64)
+    flips = batch.flips(lanes.own, lanes.opponent, move_bits).tolist()
+    for game, play, flip in zip(games, plays, flips):
+        assert {geometry.cell(bit) for bit in bitboard.bits(flip)} == reference.flipped(game, *play)
+
+
+def test_swar_count_matches_bitwise_count():
+    boards = np.random.default_rng(0).integers(0, 1 << 63, 1000, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    boards[0] = batch.FULL
+    assert batch.swar_count(boards).tolist() == [bin(board).count('1') for board in boards.tolist()]
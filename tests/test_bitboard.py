@@ -0,0 +1,16 @@
+import pytest
+
+import bitboard
+import reference
+
+
+@pytest.mark.parametrize('size', [8, 10])
+def test_geometry_matches_othello_game(size):
+    geometry = bitboard.geometry(size, size)
+    for game in reference.random_games(size, size, 10):
+        own, opponent = game.bitboards(game.turn)
+        moves = reference.legal_moves(game, game.turn)
+        assert {geometry.cell(move) for move in bitboard.bits(geometry.legal_moves(own, opponent))} == moves
+        for row, col in moves:
+            flips = geometry.flips(own, opponent, geometry.bit(row, col))
+            assert {geometry.cell(bit) for bit in bitboard.bits(flips)} == reference.flipped(game, row, col)
@@ -0,0 +1,31 @@
+import random
+import time
+
+import pytest
+
+import othello
+import patterns
+
+
+def corner_game():
+    ''' Black to move can take the free corner (0, 0) over a white bead '''
+    table = patterns.PatternTable.from_square_weights(othello.SQUARE_WEIGHTS)
+    game = othello.OthelloGame(8, 8, othello.BLACK, pattern_table=table)
+    board = [row[:] for row in game.current_board]
+    board[1][1] = othello.WHITE
+    board[2][2] = othello.BLACK
+    game.set_game_board(board)
+    return game
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4, 5])
+def test_pattern_search_scores_for_black(depth):
+    # get_possible_moves adds random moves to the ordering, the seed makes the search repeatable
+    random.seed(depth)
+    score, move = corner_game().minimax_alpha_beta(othello.BLACK, depth, othello.MIN_VALUE, othello.MAX_VALUE,
+                                                   time.time(), time_limit=60)
+    # black is ahead in every line, with the sign flipped at white's leaves odd depths went negative
+    assert score > 0
+    if depth < 5:
+        # at depth 5 the corner can wait a move, (5, 5) scores as well
+        assert move == (0, 0)
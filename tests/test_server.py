@@ -0,0 +1,59 @@
+import queue
+import threading
+
+import pool
+import server
+
+
+def start_session():
+    lines = queue.Queue()
+    return server.Session(pool.EnginePool(1), lines.put), lines
+
+
+def answers(lines, count) -> dict:
+    ''' Returns the next count answers by their first word '''
+    received = [lines.get(timeout=30).split() for number in range(count)]
+    return {words[0]: words for words in received}
+
+
+def test_stop_then_go():
+    session, lines = start_session()
+    try:
+        session.execute('go depth 60')
+        session.execute('stop')
+        assert set(answers(lines, 2)) == {'bestmove', 'ok'}
+        # the stop of the previous go does not cut the next one short
+        session.execute('go depth 3')
+        bestmove = lines.get(timeout=30).split()
+        assert bestmove[0] == 'bestmove' and bestmove[bestmove.index('depth') + 1] == '3'
+    finally:
+        session.stop()
+        session.pool.shutdown()
+
+
+def test_go_then_stop_before_the_search_starts():
+    session, lines = start_session()
+    started = threading.Event()
+    release = threading.Event()
+    think = session.engine.think
+
+    def delayed_think(*args):
+        # the worker has the go, so stop cannot cancel it, but the search has not begun
+        started.set()
+        release.wait()
+        return think(*args)
+
+    session.engine.think = delayed_think
+    try:
+        session.execute('go depth 60')
+        assert started.wait(30)
+        session.execute('stop')
+        release.set()
+        # without the stop the depth 60 search would not answer for a very long time
+        received = answers(lines, 2)
+        assert set(received) == {'bestmove', 'ok'}
+        assert int(received['bestmove'][received['bestmove'].index('depth') + 1]) < 60
+    finally:
+        release.set()
+        session.engine.stop()
+        session.pool.shutdown()
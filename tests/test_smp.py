@@ -0,0 +1,46 @@
+import threading
+
+import othello
+import search
+import smp
+import timecontrol
+
+
+def test_float_weights_do_not_hang():
+    game = othello.OthelloGame(6, 6, othello.BLACK)
+    weights = [[weight + 0.25 for weight in row] for row in game.black_weights]
+    own, opponent = game.bitboards(othello.BLACK)
+    lazy = smp.LazySMP(helpers=1, entries=1 << 12)
+    results = []
+    try:
+        thread = threading.Thread(target=lambda: results.append(
+            lazy.think(6, 6, weights, own, opponent, 4, mode=search.PVS)), daemon=True)
+        thread.start()
+        thread.join(30)
+        assert not thread.is_alive()
+        assert results[0].move is not None
+        assert 0 < len(lazy.table) <= 1 << 12
+    finally:
+        lazy.close()
+
+
+def test_helpers_search_under_time_manager():
+    lazy = smp.LazySMP(helpers=1, entries=1 << 16)
+    try:
+        game = othello.OthelloGame(8, 8, othello.BLACK, search_mode=search.PVS, smp=lazy,
+                                   time_manager=timecontrol.TimeManager(60))
+        helper_nodes = []
+        stop_helpers = lazy.stop_helpers
+
+        def counting_stop_helpers(helpers):
+            stop_helpers(helpers)
+            helper_nodes.append(lazy.last_helper_nodes)
+
+        lazy.stop_helpers = counting_stop_helpers
+        row, col = game.time_manager.choose_move(game, othello.BLACK, max_depth=6)
+        assert (row, col) != (None, None)
+        # one round of helper searches per iteration, and they did search
+        assert len(helper_nodes) == game.time_manager.last_stats['depth']
+        assert sum(helper_nodes) > 0
+    finally:
+        lazy.close()
@@ -0,0 +1,25 @@
+import othello
+import search
+import timecontrol
+
+
+def exhausted_game(turn):
+    ''' A game whose clock ran out and whose engine looks at the clock on its next node '''
+    game = othello.OthelloGame(8, 8, othello.BLACK, search_mode=search.PVS, time_manager=timecontrol.TimeManager(0.0))
+    game.engine(turn).nodes = search.CHECK_EVERY
+    return game
+
+
+def test_exhausted_clock_still_moves():
+    game = exhausted_game(othello.BLACK)
+    row, col = game.time_manager.choose_move(game, othello.BLACK)
+    assert (row, col) != (None, None)
+    game.move(row, col, real=False)
+
+
+def test_ai_replies_with_exhausted_clock():
+    game = exhausted_game(othello.WHITE)
+    game.move(2, 3)
+    # the AI answered, so black is to move again
+    assert game.turn == othello.BLACK
+    assert game.get_total_cells(othello.NONE) == 58
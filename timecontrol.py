@@ -0,0 +1,87 @@
+import time
+
+import bitboard
+import othello
+
+MAX_DEPTH = 12  # deepest iteration the time manager will start
+MOVE_OVERHEAD = 0.05  # seconds kept back for every move
+RESERVE_MOVES = 3  # extra moves the clock is divided over, as a safety margin
+ENDGAME_EMPTIES = 14  # the last moves are fast, so the clock is spent before them
+HARD_FACTOR = 4.0  # hard limit as a multiple of the soft limit
+MAX_FRACTION = 0.4  # a single move never uses more than this part of the clock
+INSTABILITY_BONUS = 0.5  # soft limit extension for every change of the best move
+BRANCHING_FACTOR = 3.0  # expected time growth from one iteration to the next
+MIN_HARD = 0.02  # seconds the hard limit never drops below, even when the clock ran out
+
+
+class TimeManager:
+
+    def __init__(self, total: float, increment=0.0):
+        ''' A game clock of total seconds per player, plus increment seconds after every move '''
+        self.total = total
+        self.increment = increment
+        self.remaining = {othello.BLACK: total, othello.WHITE: total}
+        self.last_stats = None
+
+    def allocate(self, turn: str, empties: int, instability=0) -> tuple:
+        ''' Returns the (soft, hard) limits in seconds for the next move of turn.
+            The soft limit says when to stop starting new iterations,
+            the hard limit aborts the running search. '''
+        remaining = max(self.remaining[turn] - MOVE_OVERHEAD, 0.0)
+        moves_to_go = max(empties - ENDGAME_EMPTIES, 0) // 2 + 1 + RESERVE_MOVES
+        soft = remaining / moves_to_go + 0.75 * self.increment
+        hard = max(min(soft * HARD_FACTOR, remaining * MAX_FRACTION + self.increment), MIN_HARD)
+        soft = min(soft * (1 + INSTABILITY_BONUS * instability), hard)
+        return soft, hard
+
+    def start(self, turn: str) -> float:
+        ''' Starts the clock of turn and returns the start time '''
+        return time.time()
+
+    def stop(self, turn: str, start_time: float) -> None:
+        ''' Stops the clock of turn, charging the time used since start_time '''
+        self.remaining[turn] -= time.time() - start_time
+        self.remaining[turn] += self.increment
+
+    def flagged(self, turn: str) -> bool:
+        ''' Returns True if the player ran out of time '''
+        return self.remaining[turn] < 0
+
+    def choose_move(self, game, turn: str, max_depth=MAX_DEPTH, pondered=None):
+        ''' Searches with iterative deepening until the allocated time is used
+            and returns the move of the last finished iteration. pondered is the
+            (depth, move) already searched on the opponent's time, the iterations
+            continue after it. The first iteration always finishes, so a legal
+            move is returned even when the clock ran out. '''
+        start_time = self.start(turn)
+        empties = game.get_total_cells(othello.NONE)
+        best_move = None
+        changes = 0
+        first_depth = 0
+        if pondered is not None:
+            first_depth, best_move = pondered
+        depth = first_depth
+        soft, hard = self.allocate(turn, empties)
+        for depth in range(first_depth + 1, min(max_depth, empties) + 1):
+            # without a move yet the iteration runs to the end, it is a shallow one
+            limit = hard if best_move is not None else float('inf')
+            move, finished = game.search_iteration(turn, depth, start_time, limit)
+            elapsed = time.time() - start_time
+            if not finished and (best_move is not None or move is None):
+                # the iteration was cut short, its move is not reliable
+                break
+            if best_move is not None and move != best_move:
+                changes += 1
+                soft = self.allocate(turn, empties, changes)[0]
+            best_move = move
+            if elapsed * BRANCHING_FACTOR > soft:
+                break
+        self.last_stats = {'depth': depth, 'time': time.time() - start_time, 'soft': soft, 'hard': hard}
+        self.stop(turn, start_time)
+        if best_move is None:
+            geometry = bitboard.geometry(game.rows, game.cols)
+            moves = geometry.legal_moves(*game.bitboards(turn))
+            if not moves:
+                return None, None
+            best_move = geometry.cell(moves & -moves)
+        return best_move
@@ -0,0 +1,166 @@
+import argparse
+import json
+import random
+
+import numpy as np
+
+import bitboard
+import othello
+
+# Dataset format, one position per line:  <64 cells of B, W or -> <B|W to move> <target>
+# The target is the final disc difference for the side to move, or a deep search score.
+
+CLASSES = len(othello.CLASS_WEIGHTS)
+# the square class (index into CLASS_WEIGHTS) of every square of the 8x8 board
+SQUARE_CLASSES = np.array(othello.generate_weights(8, 8, list(range(CLASSES)))).reshape(64)
+# the weights othello.OthelloGame.get_priority can order moves by
+MIN_WEIGHT = -100
+MAX_WEIGHT = 120
+
+LINEAR = 'linear'
+LOGISTIC = 'logistic'
+
+
+def load_dataset(path: str) -> tuple:
+    ''' Returns (boards, targets): boards is an N x 64 array of +1 for the side to move,
+        -1 for the opponent and 0 for empty squares '''
+    cells = []
+    turns = []
+    targets = []
+    with open(path) as file:
+        for line in file:
+            words = line.split()
+            if len(words) != 3:
+                continue
+            cells.append(words[0])
+            turns.append(words[1] == othello.WHITE)
+            targets.append(float(words[2]))
+    raw = np.frombuffer(''.join(cells).encode(), dtype=np.uint8).reshape(-1, 64)
+    boards = (raw == ord(othello.BLACK)).astype(np.int8) - (raw == ord(othello.WHITE)).astype(np.int8)
+    boards[np.array(turns, dtype=bool)] *= -1
+    return boards, np.array(targets, dtype=np.float64)
+
+
+def class_features(boards) -> np.ndarray:
+    ''' Returns the N x CLASSES own minus opponent bead counts of every square class '''
+    one_hot = np.zeros((64, CLASSES))
+    one_hot[np.arange(64), SQUARE_CLASSES] = 1
+    return boards.astype(np.float64) @ one_hot
+
+
+def phases_of(boards, phases: int) -> np.ndarray:
+    ''' Returns the phase of every board, by the number of beads on it '''
+    beads = np.count_nonzero(boards, axis=1)
+    return np.minimum((beads - 4) * phases // 61, phases - 1)
+
+
+def fit(features, targets, loss=LINEAR, epochs=30, batch_size=1024, learning_rate=0.05, l2=1e-4, seed=0):
+    ''' Fits weights by mini-batch gradient descent with Adam. LINEAR fits the scores,
+        LOGISTIC fits win (1), draw (0.5) or loss (0) from the sign of the targets. '''
+    generator = np.random.default_rng(seed)
+    if loss == LOGISTIC:
+        targets = (np.sign(targets) + 1) / 2
+        # disc counts are large, keep the logits in a sane range
+        features = features / 8
+    else:
+        scale = max(np.abs(targets).max(), 1.0)
+        targets = targets / scale
+    weights = np.zeros(features.shape[1])
+    first_moment = np.zeros_like(weights)
+    second_moment = np.zeros_like(weights)
+    step = 0
+    for epoch in range(epochs):
+        order = generator.permutation(len(targets))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            prediction = features[batch] @ weights
+            if loss == LOGISTIC:
+                prediction = 1 / (1 + np.exp(-prediction))
+            gradient = features[batch].T @ (prediction - targets[batch]) / len(batch) + l2 * weights
+            step += 1
+            first_moment = 0.9 * first_moment + 0.1 * gradient
+            second_moment = 0.999 * second_moment + 0.001 * gradient ** 2
+            corrected = first_moment / (1 - 0.9 ** step)
+            weights -= learning_rate * corrected / (np.sqrt(second_moment / (1 - 0.999 ** step)) + 1e-8)
+    return weights
+
+
+def weight_table(class_weights, largest=MAX_WEIGHT) -> [[int]]:
+    ''' Scales the fitted class weights so the largest is worth `largest` and returns an 8x8 table.
+        One scale keeps every weight within MIN_WEIGHT..MAX_WEIGHT, the range the move
+        ordering knows, so a strongly negative class shrinks the whole table instead of
+        being cut off and the ratios of the fit are kept. '''
+    class_weights = np.asarray(class_weights)
+    positive = max(class_weights.max(), 0)
+    negative = max(-class_weights.min(), 0)
+    scale = min(min(largest, MAX_WEIGHT) / max(positive, 1e-9), -MIN_WEIGHT / max(negative, 1e-9))
+    return othello.generate_weights(8, 8, [int(round(weight * scale)) for weight in class_weights])
+
+
+def tune(boards, targets, phases=1, loss=LINEAR, **options) -> [[[int]]]:
+    ''' Returns one SQUARE_WEIGHTS compatible table per phase '''
+    features = class_features(boards)
+    board_phases = phases_of(boards, phases)
+    tables = []
+    for phase in range(phases):
+        selected = board_phases == phase
+        if not selected.any():
+            tables.append(othello.SQUARE_WEIGHTS)
+            continue
+        tables.append(weight_table(fit(features[selected], targets[selected], loss, **options)))
+    return tables
+
+
+def generate(games: int, path: str, seed=0) -> None:
+    ''' Writes the positions of random games, labelled with their final disc difference '''
+    generator = random.Random(seed)
+    geometry = bitboard.geometry(8, 8)
+    with open(path, 'w') as file:
+        for game in range(games):
+            positions = []
+
+            def choose(own, opponent, turn, moves):
+                positions.append((own, opponent, turn))
+                return generator.choice(list(bitboard.bits(moves)))
+
+            own, opponent, turn = othello.play_from_start(choose)
+            black, white = (own, opponent) if turn == othello.BLACK else (opponent, own)
+            black_margin = bitboard.count(black) - bitboard.count(white)
+            for own, opponent, turn in positions:
+                board = geometry.to_board(own, opponent, turn, othello.opposite_turn(turn), othello.NONE)
+                margin = black_margin if turn == othello.BLACK else -black_margin
+                file.write('{} {} {}\n'.format(''.join(map(''.join, board)), turn, margin))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fits the square weights from labelled positions')
+    commands = parser.add_subparsers(dest='command', required=True)
+    generate_parser = commands.add_parser('generate', help='write a dataset of random games')
+    generate_parser.add_argument('out')
+    generate_parser.add_argument('--games', type=int, default=1000)
+    generate_parser.add_argument('--seed', type=int, default=0)
+    fit_parser = commands.add_parser('fit', help='fit the weights of a dataset')
+    fit_parser.add_argument('dataset')
+    fit_parser.add_argument('--out', default='weights.json')
+    fit_parser.add_argument('--phases', type=int, default=1)
+    fit_parser.add_argument('--loss', choices=[LINEAR, LOGISTIC], default=LINEAR)
+    fit_parser.add_argument('--epochs', type=int, default=30)
+    fit_parser.add_argument('--batch-size', type=int, default=1024)
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        generate(args.games, args.out, args.seed)
+        return
+    boards, targets = load_dataset(args.dataset)
+    tables = tune(boards, targets, args.phases, args.loss, epochs=args.epochs, batch_size=args.batch_size)
+    with open(args.out, 'w') as file:
+        # a single table is written as is, so it can be used anywhere SQUARE_WEIGHTS is
+        json.dump(tables[0] if args.phases == 1 else tables, file)
+    for phase, table in enumerate(tables):
+        print('phase {}:'.format(phase))
+        for row in table:
+            print(row)
+
+
+if __name__ == '__main__':
+    main()